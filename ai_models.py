@@ -6,22 +6,22 @@ Centralized AI expert definitions following DeepSeek API best practices
 
 from typing import Dict, List
 
+class FrozenMessage(dict):
+    """Read-only chat message; still a dict so it serializes straight into API payloads"""
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("System prompts are shared and must not be modified")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
 class AIModelPrompts:
     """Centralized AI model system prompts with optimized configurations"""
     
     @staticmethod
     def get_system_prompt(model_id: str) -> Dict[str, str]:
         """Get optimized system prompt for specified AI model"""
-        prompts = {
-            'financial': AIModelPrompts._get_financial_prompt(),
-            'property': AIModelPrompts._get_property_prompt(),
-            'cloner': AIModelPrompts._get_company_prompt(),
-            'scam_search': AIModelPrompts._get_scam_prompt(),
-            'profile_gen': AIModelPrompts._get_profile_prompt(),
-            'marketing': AIModelPrompts._get_marketing_prompt(),
-            'assistant': AIModelPrompts._get_assistant_prompt()
-        }
-        return prompts.get(model_id, prompts['assistant'])
+        return _SYSTEM_PROMPTS.get(model_id, _SYSTEM_PROMPTS['assistant'])
     
     @staticmethod
     def _get_financial_prompt() -> Dict[str, str]:
@@ -344,6 +344,21 @@ Provide comprehensive professional analysis with:
 Format responses as professional consulting reports with executive summaries and detailed recommendations."""
         }
 
+# Prompts are static, so each system message is built once at import and shared.
+# They are frozen because a stable prompt prefix is what lets the API cache it.
+_SYSTEM_PROMPTS: Dict[str, FrozenMessage] = {
+    model_id: FrozenMessage(builder())
+    for model_id, builder in (
+        ('financial', AIModelPrompts._get_financial_prompt),
+        ('property', AIModelPrompts._get_property_prompt),
+        ('cloner', AIModelPrompts._get_company_prompt),
+        ('scam_search', AIModelPrompts._get_scam_prompt),
+        ('profile_gen', AIModelPrompts._get_profile_prompt),
+        ('marketing', AIModelPrompts._get_marketing_prompt),
+        ('assistant', AIModelPrompts._get_assistant_prompt)
+    )
+}
+
 class AIModelConfig:
     """Configuration utilities for AI models"""
     
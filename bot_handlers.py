@@ -6,28 +6,308 @@ Refactored for improved maintainability and performance
 
 import logging
 import asyncio
+import hmac
+import html
+import hashlib
+import json
+import functools
 import time
 import os
+import re
+import unicodedata
 from datetime import datetime
-from typing import Dict, List, Optional
-from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional
+from collections import deque
+
+from cachetools import LRUCache
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from telegram.constants import ParseMode
+from telegram.constants import ChatAction, ParseMode
+from telegram.error import TelegramError
 
-from deepseek_client import DeepSeekClient
+from deepseek_client import DeepSeekClient, StreamInterruptedError
 from config import Config
 from ai_models import AIModelPrompts, AIModelConfig
 from data_generators import UKDataGenerator, ScamDatabase
+from storage import BotStorage, ChatTurn, ConversationCache
+from prompt_guard import detect_prompt_injection
 
 logger = logging.getLogger(__name__)
 
+# Prefixes DeepSeekClient uses to flag error strings instead of AI replies
+_ERROR_PREFIXES = ('❌', '⏰', '🌐', '🔒')
+_CONNECTION_ERROR_PREFIXES = ('🌐', '🔒')
+
+# Minimum seconds between edits of a streaming reply (keeps well under Telegram flood limits)
+_STREAM_EDIT_INTERVAL = 0.8
+
+# Number of users whose conversation history is kept in memory (the rest stay on disk)
+_CONVERSATION_CACHE_SIZE = 50_000
+
+# Number of exact-match AI responses kept in memory
+_RESPONSE_CACHE_SIZE = 2048
+
+# Seconds dashboard log entries may wait so a burst of replies is logged in one batch
+_DASHBOARD_FLUSH_INTERVAL = 0.05
+
+# Static replies are pre-formatted as HTML so Telegram doesn't re-parse Markdown on every send
+_AUTH_REQUIRED_MSG = "🔐 Please use /start and enter the passcode first."
+
+_ACCESS_GRANTED_MSG = (
+    "✅ <b>Access Granted!</b>\n\n"
+    "Welcome to WalshAI Professional Suite!\n\n"
+    "🎯 <b>Your AI experts and professional tools are now available</b>\n\n"
+    "Use /start to access the full suite of professional tools and AI experts."
+)
+
+_INCORRECT_PASSCODE_MSG = (
+    "❌ <b>Incorrect Passcode</b>\n\n"
+    "Please enter the correct 4-digit passcode to access WalshAI Professional Suite."
+)
+
+_ACCESS_RESTRICTED_MSG = (
+    "🔐 <b>Access Restricted</b>\n\n"
+    "Please enter the 4-digit passcode to access WalshAI Professional Suite:\n\n"
+    "Send the passcode as a message to continue."
+)
+
+_STILL_WORKING_MSG = (
+    "⏳ <b>Still Working</b>\n\n"
+    "Your previous messages are still being processed.\n"
+    "Please wait for a reply before sending more."
+)
+
+_START_ERROR_MSG = (
+    "❌ <b>System Error</b>\n\n"
+    "An error occurred while starting the bot.\n"
+    "Please try again or contact support."
+)
+
+_SYSTEM_ERROR_MSG = (
+    "🔧 <b>Professional System Error</b>\n\n"
+    "A technical error occurred in the professional AI system.\n\n"
+    "<b>Recovery Options:</b>\n"
+    "• Use /clear to reset the system\n"
+    "• Try /start to access tools menu\n"
+    "• Switch AI experts with /models\n\n"
+    "<b>Status:</b> Professional tools are being restored"
+)
+
+_MODELS_PROMPT_MSG = "🔄 <b>Choose Your AI Expert:</b>\n\nSelect the specialist you'd like to work with:"
+
+# Tool list shown for each AI expert
+_TOOLS_BY_MODEL = {
+    'financial': "• Transaction Analysis\n• AML Risk Assessment\n• Entity Investigation\n• Fund Tracing",
+    'property': "• Development Analysis\n• Investment Calculator\n• Market Research\n• Feasibility Studies",
+    'company': "• Company Deep Dive\n• Business Model Analysis\n• Legal Structure Analysis\n• Competitive Intelligence",
+    'scam_search': "• Scam Type Identification\n• Romance Scam Detection\n• Investment Fraud Analysis\n• Phishing Detection",
+    'profile_gen': "• UK Identity Generation\n• Document Number Creation\n• Address Generation\n• Contact Details",
+    'marketing': "• Campaign Strategy\n• Audience Analysis\n• Luxury Marketing\n• International Strategies",
+    'assistant': "• General Analysis\n• Research Support\n• Writing Assistance\n• Problem Solving"
+}
+
+# Reply templates: only the per-user slots are filled in at request time
+_WELCOME_TEMPLATE = (
+    "🎯 <b>Welcome to WalshAI Professional Suite!</b>\n\n"
+    "Hi {first_name}! Your comprehensive AI toolkit with advanced expert capabilities.\n\n"
+    "<b>Current Expert:</b> {emoji} {name}\n\n"
+    "<b>🛠️ Available Professional Tools:</b>\n"
+    "• Financial Investigation Suite\n"
+    "• Property Development Tools\n"
+    "• Company Intelligence Platform\n"
+    "• Scam Detection Database\n"
+    "• UK Profile Generator\n"
+    "• Marketing Analytics Suite\n\n"
+    "Choose an expert or access professional tools below! 🚀"
+)
+
+_MAIN_MENU_TEMPLATE = (
+    "🎯 *Welcome to WalshAI Professional Suite!*\n\n"
+    "Your comprehensive AI toolkit with expert capabilities.\n\n"
+    "*Current Expert:* {emoji} {name}\n\n"
+    "Choose an expert below and start chatting! 🚀"
+)
+
+_CLEARED_MSG = (
+    "🗑️ <b>Conversation &amp; Analysis Data Cleared!</b>\n\n"
+    "• Conversation history cleared\n"
+    "• Investigation data reset\n"
+    "• Generated profiles cleared\n"
+    "• Analysis cache reset\n\n"
+    "You can start fresh with any AI expert or tools!"
+)
+
+_CLEARED_CALLBACK_MSG = (
+    "🗑️ *Professional Data Cleared!*\n\n"
+    "Your conversation history and analysis data has been cleared.\n"
+    "You can start fresh with any expert or tool."
+)
+
+# Greetings and thanks get a canned reply instead of a full expert API call
+_GREETING_RE = re.compile(
+    r"(?:hi|hello|hey|hiya|yo|good (?:morning|afternoon|evening))(?: there)?[\s!.]*", re.IGNORECASE
+)
+_THANKS_RE = re.compile(
+    r"(?:thanks|thank you|thx|ty|cheers)(?: (?:a lot|so much|very much))?[\s!.]*", re.IGNORECASE
+)
+
+_GREETING_TEMPLATE = (
+    "👋 Hi! You're chatting with the {emoji} *{name}*.\n\n"
+    "Send a professional question to get started, or use /start for the full menu."
+)
+
+_THANKS_MSG = "🙏 You're welcome! Send another question whenever you're ready."
+
+_INJECTION_BLOCKED_MSG = (
+    "🛡️ <b>Request Blocked</b>\n\n"
+    "Your message looks like an attempt to override or reveal the AI expert's instructions.\n\n"
+    "Please rephrase your question as a normal professional query."
+)
+
+# Static replies for handle_message failure paths
+_CONNECTION_ERROR_MSG = (
+    "🔧 <b>Connection Issue Detected</b>\n\n"
+    "The AI service is temporarily unavailable. This could be due to:\n"
+    "• DeepSeek API credits may be low\n"
+    "• Network connectivity issues\n"
+    "• API service maintenance\n\n"
+    "<b>Quick Solutions:</b>\n"
+    "1. Check your DeepSeek credits at platform.deepseek.com\n"
+    "2. Try again in a few moments\n"
+    "3. Use /start to access the menu\n\n"
+    "<b>Status:</b> AI experts will be restored once connection is reestablished."
+)
+
+_CREDITS_MSG = (
+    "💳 <b>Professional Service Temporarily Unavailable</b>\n\n"
+    "The AI expert service requires additional credits:\n\n"
+    "🔧 <b>Resolution Steps:</b>\n"
+    "1. Visit <a href=\"https://platform.deepseek.com\">DeepSeek Platform</a>\n"
+    "2. Add credits to your professional account\n"
+    "3. Wait 2-3 minutes for service activation\n"
+    "4. Retry your professional query\n\n"
+    "💡 <b>Note:</b> Professional AI experts require active API credits for analysis."
+)
+
+# Appended (plain text) to a reply whose stream broke off before the API finished it
+_INCOMPLETE_NOTICE = "\n\n⚠️ Incomplete reply: the AI service stopped before finishing. Please ask again."
+
+_TIMEOUT_MSG = (
+    "⏰ <b>Professional Analysis Timeout</b>\n\n"
+    "Your query requires complex professional analysis that exceeded the time limit.\n\n"
+    "<b>Optimization Tips:</b>\n"
+    "• Break complex queries into focused questions\n"
+    "• Use specific professional terminology\n"
+    "• Try again with simplified requirements\n\n"
+    "<b>Status:</b> Professional AI experts are operational"
+)
+
+_GENERIC_ERROR_MSG = (
+    "❌ <b>Professional System Error</b>\n\n"
+    "An error occurred during professional analysis.\n\n"
+    "<b>Recovery Options:</b>\n"
+    "• Use /clear to reset professional analysis state\n"
+    "• Try switching AI experts with /models\n"
+    "• Contact support if issue persists\n\n"
+    "<b>Status:</b> Professional tools are being restored"
+)
+
+def require_auth(handler):
+    """Only run a BotHandlers handler for users who have entered the passcode"""
+    @functools.wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if update.effective_user.id not in self.authenticated_users:
+            query = update.callback_query
+            if query:
+                await query.answer()
+                await query.edit_message_text(_AUTH_REQUIRED_MSG, parse_mode=ParseMode.HTML)
+            else:
+                await update.message.reply_text(_AUTH_REQUIRED_MSG, parse_mode=ParseMode.HTML)
+            return
+        return await handler(self, update, context)
+    return wrapper
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Sentence punctuation at the edge of a word ("AML?", "Hello,") carries no meaning for a cache key.
+# Inside a word it can ("5.3", "it's"), and currency, operator and % signs are never touched.
+_EDGE_PUNCTUATION_RE = re.compile(r"""(?<!\S)[?!.,;:"'“”‘’…()]+|[?!.,;:"'“”‘’…()]+(?!\S)""")
+
+
+def _canonicalize(text: str) -> str:
+    """Normalize text for cache keys only (NFKC, edge punctuation dropped, collapsed whitespace, casefolded)"""
+    text = _EDGE_PUNCTUATION_RE.sub("", unicodedata.normalize("NFKC", text))
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def _estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token plus per-message overhead)"""
+    return len(text) // 4 + 4
+
+
+# Preferred break points for long replies, best first (UTF-16-LE, the unit Telegram counts in)
+_SPLIT_SEPARATORS = tuple(separator.encode('utf-16-le') for separator in ('\n\n', '\n', '. '))
+
+
+def _utf16_len(text: str) -> int:
+    """Length as Telegram measures it (UTF-16 code units, so emoji may count twice)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _find_split(data: bytes, start: int, end: int) -> int:
+    """Find where to end a chunk of UTF-16-LE data, preferring paragraph, line, then sentence breaks"""
+    for separator in _SPLIT_SEPARATORS:
+        position = data.rfind(separator, start, end)
+        # Skip matches that straddle two code units
+        while position > start and position % 2:
+            position = data.rfind(separator, start, position + len(separator) - 1)
+        if position > start:
+            return position + len(separator)
+    # No natural break: hard cut, but never between the halves of a surrogate pair
+    if 0xDC <= data[end + 1] <= 0xDF:
+        end -= 2
+    return end
+
+
+def _split_message(text: str, limit: int = 3800):
+    """Lazily yield chunks of at most limit Telegram characters, breaking at natural boundaries"""
+    data = text.encode('utf-16-le')
+    size = len(data)
+    start = 0
+    while start < size:
+        end = start + limit * 2
+        if end < size:
+            end = _find_split(data, start, end)
+        yield data[start:end].decode('utf-16-le')
+        start = end
+
 class BotHandlers:
     """Handles all bot commands and messages with advanced AI expert tools"""
     
+    # One long-lived instance: fixed slots make the hot-path self.* reads cheaper
+    __slots__ = (
+        'config', 'deepseek_client', 'conversations', 'user_models', 'user_buckets',
+        'user_queues', 'user_workers', '_background_tasks', '_processing_commands',
+        'dashboard', 'REQUIRED_PASSCODE', 'storage', 'authenticated_users',
+        'investigation_database', 'property_database', 'company_profiles', 'generated_profiles',
+        'uk_generator', 'scam_database', '_start_markup', '_models_markup',
+        '_help_full', '_help_short', '_current_texts', '_current_callback_texts',
+        '_rate_limit_msg', '_too_long_template',
+        '_response_cache', '_inflight',
+        '_rate_capacity', '_refill_per_second', '_max_message_length', '_max_history_tokens',
+        '_dashboard_events', '_dashboard_writer',
+    )
+    
     def __init__(self, config: Config):
         self.config = config
+        
+        # Limits read on every message, resolved once instead of through config each time
+        self._rate_capacity = float(config.RATE_LIMIT_REQUESTS)
+        self._refill_per_second = config.RATE_LIMIT_REQUESTS / config.RATE_LIMIT_WINDOW
+        self._max_message_length = config.MAX_MESSAGE_LENGTH
+        self._max_history_tokens = config.MAX_HISTORY_TOKENS
         self.deepseek_client = DeepSeekClient(
             api_key=config.DEEPSEEK_API_KEY,
             api_url=config.DEEPSEEK_API_URL,
@@ -36,21 +316,46 @@ class BotHandlers:
             max_retries=config.MAX_RETRIES
         )
         
-        # Store conversation history per user
-        self.conversations: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+        # Persistent storage for state that must survive restarts
+        self.storage = BotStorage(config.DATABASE_PATH)
+        
+        # Store conversation history per user (bounded, oldest turns drop off, persisted to disk)
+        max_history = min(config.MAX_CONVERSATION_HISTORY, 8) * 2
+        self.conversations = ConversationCache(self.storage, _CONVERSATION_CACHE_SIZE, max_history)
+        
+        # Store selected AI model per user (readers default to financial)
+        self.user_models: Dict[int, str] = {}
+        
+        # Rate limiting per user: token bucket of [tokens left, last refill time], created full
+        self.user_buckets: Dict[int, List[float]] = {}
+        
+        # Per-user message queues so replies stay ordered within a chat
+        # while slow AI calls for one user never hold up other users
+        self.user_queues: Dict[int, asyncio.Queue] = {}
+        self.user_workers: Dict[int, asyncio.Task] = {}
+        
+        # Strong references keep fire-and-forget tasks alive until they finish
+        self._background_tasks: set = set()
+        
+        # Dashboard log entries waiting for the writer task, which runs only while there are any
+        self._dashboard_events: List[Dict] = []
+        self._dashboard_writer: Optional[asyncio.Task] = None
         
-        # Store selected AI model per user (default to financial)
-        self.user_models: Dict[int, str] = defaultdict(lambda: 'financial')
+        # Cache of AI responses keyed on the full request, after _canonicalize
+        self._response_cache: LRUCache = LRUCache(maxsize=_RESPONSE_CACHE_SIZE)
         
-        # Rate limiting per user
-        self.user_requests: Dict[int, deque] = defaultdict(lambda: deque(maxlen=config.RATE_LIMIT_REQUESTS))
+        # Futures for API calls in progress, so identical concurrent requests share one call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Commands currently being handled, to drop duplicate /start deliveries
+        self._processing_commands: set = set()
         
         # Dashboard reference (will be set by main.py)
         self.dashboard = None
         
-        # Passcode protection
+        # Passcode protection (authenticated users persist across restarts)
         self.REQUIRED_PASSCODE = "5015"
-        self.authenticated_users: set = set()
+        self.authenticated_users: set = self.storage.load_authenticated_users()
         
         # Advanced tools storage
         self.investigation_database = {}
@@ -61,24 +366,170 @@ class BotHandlers:
         # Initialize data generators
         self.uk_generator = UKDataGenerator()
         self.scam_database = ScamDatabase()
+        
+        # Static keyboards are built once and reused by every handler
+        self._start_markup = self._build_start_markup()
+        self._models_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(f"{model_info['emoji']} {model_info['name']}", callback_data=f"model_{model_id}")]
+            for model_id, model_info in config.AI_MODELS.items()
+        ])
+        
+        # Help content only depends on static config, so render it once
+        self._help_full = self._build_help_text(config)
+        self._help_short = self._build_help_text(config, extended=False)
+        
+        # "Current expert" replies only depend on the expert, so render one per model
+        self._current_texts = {
+            model_id: self._build_current_text(model_id, model_info)
+            for model_id, model_info in config.AI_MODELS.items()
+        }
+        self._current_callback_texts = {
+            model_id: self._build_current_text(model_id, model_info, callback=True)
+            for model_id, model_info in config.AI_MODELS.items()
+        }
+        
+        # Limit replies only depend on config; the length slot is filled per message
+        self._rate_limit_msg = (
+            "⏰ <b>Rate Limit Exceeded</b>\n\n"
+            "Professional tools have usage limits to ensure quality service.\n"
+            "Please wait before sending another request.\n\n"
+            f"<b>Limit:</b> {config.RATE_LIMIT_REQUESTS} requests per {config.RATE_LIMIT_WINDOW} seconds"
+        )
+        self._too_long_template = (
+            "📝 <b>Message Too Long</b>\n\n"
+            f"Please keep your professional queries under {config.MAX_MESSAGE_LENGTH} characters.\n"
+            "Current length: {length} characters\n\n"
+            "<b>Tip:</b> Break complex queries into smaller, focused questions."
+        )
     
+    @staticmethod
+    def _build_start_markup() -> InlineKeyboardMarkup:
+        """Build the main menu keyboard with AI experts and professional tools"""
+        keyboard = []
+        
+        # AI Experts selection (2 per row for clean layout)
+        keyboard.append([
+            InlineKeyboardButton("🔍 Financial Expert", callback_data="model_financial"),
+            InlineKeyboardButton("🤖 General Assistant", callback_data="model_assistant")
+        ])
+        
+        keyboard.append([
+            InlineKeyboardButton("🏗️ Property Expert", callback_data="model_property"),
+            InlineKeyboardButton("🏢 Company Expert", callback_data="model_cloner")
+        ])
+        
+        keyboard.append([
+            InlineKeyboardButton("📈 Marketing Expert", callback_data="model_marketing"),
+            InlineKeyboardButton("🚨 Scam Expert", callback_data="model_scam_search")
+        ])
+        
+        keyboard.append([
+            InlineKeyboardButton("🆔 Profile Generator", callback_data="model_profile_gen")
+        ])
+        
+        # Communication & Export Tools
+        keyboard.append([
+            InlineKeyboardButton("📧 Communication Tools", callback_data="tools_communication"),
+            InlineKeyboardButton("📥 Export Data", callback_data="tools_exports")
+        ])
+        
+        # Utility buttons
+        keyboard.append([
+            InlineKeyboardButton("📋 Help", callback_data="help"),
+            InlineKeyboardButton("🗑️ Clear History", callback_data="clear")
+        ])
+        
+        keyboard.append([
+            InlineKeyboardButton("🔄 Current Expert", callback_data="current"),
+            InlineKeyboardButton("🌐 Dashboard", url="http://0.0.0.0:5000")
+        ])
+        
+        return InlineKeyboardMarkup(keyboard)
     
+    @staticmethod
+    def _build_help_text(config: Config, extended: bool = True) -> str:
+        """Build help content from the configured AI experts; extended adds commands and limits"""
+        experts_heading = "Available AI Experts" if extended else "AI Experts Available"
+        help_message = (
+            "<b>🎯 WalshAI Professional Suite</b>\n\n"
+            f"<b>🔧 {experts_heading}:</b>\n"
+        )
+        
+        for model_id, model_info in config.AI_MODELS.items():
+            help_message += f"• {model_info['emoji']} <b>{html.escape(model_info['name'])}</b>\n  {html.escape(model_info['description'])}\n\n"
+        
+        if extended:
+            help_message += (
+                "<b>🛠️ Professional Tools:</b>\n"
+                "• <b>Financial Investigation Suite</b> - AML, transaction analysis, fraud detection\n"
+                "• <b>Property Development Tools</b> - ROI calculators, market analysis, feasibility studies\n"
+                "• <b>Company Intelligence Platform</b> - Business analysis, competitive intelligence\n"
+                "• <b>Scam Detection Database</b> - Fraud identification, protection strategies\n"
+                "• <b>UK Profile Generator</b> - Testing data creation (fictional profiles)\n"
+                "• <b>Marketing Analytics Suite</b> - Campaign strategy, audience analysis\n"
+                "• <b>Communication Tools</b> - Phishing analysis, SMTP to SMS, mass email\n"
+                "• <b>Data Export Suite</b> - CSV exports of all data and analytics\n\n"
+                "<b>📋 Commands:</b>\n"
+                "• <code>/start</code> - Main menu with expert selection and tools\n"
+                "• <code>/models</code> - Switch between AI experts\n"
+                "• <code>/current</code> - Show current AI expert and tools\n"
+                "• <code>/help</code> - Show this comprehensive help\n"
+                "• <code>/clear</code> - Clear conversation history\n\n"
+                "<b>⚖️ Security &amp; Limits:</b>\n"
+                f"• Rate limit: {config.RATE_LIMIT_REQUESTS} requests per {config.RATE_LIMIT_WINDOW} seconds\n"
+                f"• Message limit: {config.MAX_MESSAGE_LENGTH} characters\n"
+                f"• Conversation history: {config.MAX_CONVERSATION_HISTORY} messages\n\n"
+                "🔒 <b>Privacy:</b> All conversations are encrypted and secure."
+            )
+        else:
+            help_message += (
+                "<b>🛠️ Professional Tool Suite:</b>\n"
+                "• Financial Investigation &amp; AML Compliance\n"
+                "• Property Development &amp; Investment Analysis\n"
+                "• Company Intelligence &amp; Business Analysis\n"
+                "• Scam Detection &amp; Security Assessment\n"
+                "• UK Profile Generation (Testing)\n"
+                "• Marketing Analytics &amp; Strategy\n\n"
+                "<b>💡 Usage:</b>\n"
+                "• Select experts for specialized knowledge\n"
+                "• Access professional tools via /start menu\n"
+                "• Each expert has dedicated analysis tools\n"
+                "• All data processing is secure and professional\n\n"
+                "🔒 <b>Enterprise-Grade Security &amp; Privacy</b>"
+            )
+        
+        return help_message
+    
+    @staticmethod
+    def _build_current_text(model_id: str, model_info: Dict, callback: bool = False) -> str:
+        """Build the current-expert message for /current or the Current Expert button"""
+        header = (
+            f"🤖 *Current AI Expert:*\n\n"
+            f"{model_info['emoji']} *{model_info['name']}*\n"
+            f"Specialty: {model_info['description']}\n\n"
+        )
+        tools = _TOOLS_BY_MODEL.get(model_id, "• General AI Assistance")
+        if callback:
+            return header + f"*Available Professional Tools:*\n{tools}\n\nSend your professional queries to this expert!"
+        return header + f"*Available Tools:*\n{tools}\n\nUse `/models` to switch to a different expert."
     
     def is_rate_limited(self, user_id: int) -> bool:
         """Check if user is rate limited"""
-        now = time.time()
-        user_queue = self.user_requests[user_id]
+        now = time.monotonic()
+        bucket = self.user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self.user_buckets[user_id] = [self._rate_capacity, now]
         
-        # Remove old requests outside the window
-        while user_queue and now - user_queue[0] > self.config.RATE_LIMIT_WINDOW:
-            user_queue.popleft()
+        # Refill at RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW, capped at a full bucket
+        tokens = bucket[0] + (now - bucket[1]) * self._refill_per_second
+        bucket[0] = min(self._rate_capacity, tokens)
+        bucket[1] = now
         
-        # Check if limit exceeded
-        if len(user_queue) >= self.config.RATE_LIMIT_REQUESTS:
+        if bucket[0] < 1.0:
             return True
         
-        # Add current request
-        user_queue.append(now)
+        # Spend a token on the current request
+        bucket[0] -= 1.0
         return False
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -88,13 +539,9 @@ class BotHandlers:
         
         # Prevent duplicate processing using a more reliable method
         processing_key = f'processing_start_{user_id}'
-        if hasattr(self, '_processing_commands') and processing_key in self._processing_commands:
+        if processing_key in self._processing_commands:
             return
         
-        # Initialize processing tracker if it doesn't exist
-        if not hasattr(self, '_processing_commands'):
-            self._processing_commands = set()
-        
         self._processing_commands.add(processing_key)
         
         try:
@@ -102,92 +549,32 @@ class BotHandlers:
         
             # Check if user is authenticated
             if user_id not in self.authenticated_users:
-                await update.message.reply_text(
-                    "🔐 *Access Restricted*\n\n"
-                    "Please enter the 4-digit passcode to access WalshAI Professional Suite:\n\n"
-                    "Send the passcode as a message to continue.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
+                await update.message.reply_text(_ACCESS_RESTRICTED_MSG, parse_mode=ParseMode.HTML)
                 return
-        
-        # Create clean button menu with AI Experts
-            keyboard = []
-        
-        # AI Experts selection (2 per row for clean layout)
-            keyboard.append([
-                InlineKeyboardButton("🔍 Financial Expert", callback_data="model_financial"),
-                InlineKeyboardButton("🤖 General Assistant", callback_data="model_assistant")
-            ])
-            
-            keyboard.append([
-                InlineKeyboardButton("🏗️ Property Expert", callback_data="model_property"),
-                InlineKeyboardButton("🏢 Company Expert", callback_data="model_cloner")
-            ])
-            
-            keyboard.append([
-                InlineKeyboardButton("📈 Marketing Expert", callback_data="model_marketing"),
-                InlineKeyboardButton("🚨 Scam Expert", callback_data="model_scam_search")
-            ])
             
-            keyboard.append([
-                InlineKeyboardButton("🆔 Profile Generator", callback_data="model_profile_gen")
-            ])
-            
-            # Communication & Export Tools
-            keyboard.append([
-                InlineKeyboardButton("📧 Communication Tools", callback_data="tools_communication"),
-                InlineKeyboardButton("📥 Export Data", callback_data="tools_exports")
-            ])
-            
-            # Utility buttons
-            keyboard.append([
-                InlineKeyboardButton("📋 Help", callback_data="help"),
-                InlineKeyboardButton("🗑️ Clear History", callback_data="clear")
-            ])
-            
-            keyboard.append([
-                InlineKeyboardButton("🔄 Current Expert", callback_data="current"),
-                InlineKeyboardButton("🌐 Dashboard", url="http://0.0.0.0:5000")
-            ])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            current_model = self.user_models[user_id]
+            current_model = self.user_models.get(user_id, 'financial')
             model_info = self.config.AI_MODELS[current_model]
             
-            welcome_message = (
-                f"🎯 *Welcome to WalshAI Professional Suite!*\n\n"
-                f"Hi {user.first_name}! Your comprehensive AI toolkit with advanced expert capabilities.\n\n"
-                f"*Current Expert:* {model_info['emoji']} {model_info['name']}\n\n"
-                f"*🛠️ Available Professional Tools:*\n"
-                f"• Financial Investigation Suite\n"
-                f"• Property Development Tools\n"
-                f"• Company Intelligence Platform\n"
-                f"• Scam Detection Database\n"
-                f"• UK Profile Generator\n"
-                f"• Marketing Analytics Suite\n\n"
-                f"Choose an expert or access professional tools below! 🚀"
+            welcome_message = _WELCOME_TEMPLATE.format(
+                first_name=html.escape(user.first_name or ''),
+                emoji=model_info['emoji'],
+                name=html.escape(model_info['name'])
             )
             
             await update.message.reply_text(
                 welcome_message, 
-                reply_markup=reply_markup,
-                parse_mode=ParseMode.MARKDOWN
+                reply_markup=self._start_markup,
+                parse_mode=ParseMode.HTML
             )
         
         except Exception as e:
             logger.error(f"Error in start_command: {e}")
-            await update.message.reply_text(
-                "❌ **System Error**\n\n"
-                "An error occurred while starting the bot.\n"
-                "Please try again or contact support.",
-                parse_mode=ParseMode.MARKDOWN
-            )
+            await update.message.reply_text(_START_ERROR_MSG, parse_mode=ParseMode.HTML)
         finally:
             # Clear processing flag
-            if hasattr(self, '_processing_commands'):
-                self._processing_commands.discard(processing_key)
+            self._processing_commands.discard(processing_key)
     
+    @require_auth
     async def handle_model_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle model selection and advanced tool callbacks"""
         query = update.callback_query
@@ -195,14 +582,6 @@ class BotHandlers:
         
         user_id = update.effective_user.id
         
-        # Check authentication
-        if user_id not in self.authenticated_users:
-            await query.edit_message_text(
-                "🔐 Please use /start and enter the passcode first.",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            return
-        
         if query.data.startswith("model_"):
             await self.handle_model_change(query, user_id)
         elif query.data == "back_main":
@@ -244,8 +623,7 @@ class BotHandlers:
             )
             
             # Clear conversation history when switching models
-            if user_id in self.conversations:
-                del self.conversations[user_id]
+            await self.conversations.forget(user_id)
     
     async def handle_tool_selection(self, query, user_id):
         """Handle advanced tool selection"""
@@ -469,16 +847,7 @@ class BotHandlers:
     
     def get_tools_for_model(self, model_id: str) -> str:
         """Get available tools for specific model"""
-        tools_map = {
-            'financial': "• Transaction Analysis\n• AML Risk Assessment\n• Entity Investigation\n• Fund Tracing",
-            'property': "• Development Analysis\n• Investment Calculator\n• Market Research\n• Feasibility Studies",
-            'company': "• Company Deep Dive\n• Business Model Analysis\n• Legal Structure Analysis\n• Competitive Intelligence",
-            'scam_search': "• Scam Type Identification\n• Romance Scam Detection\n• Investment Fraud Analysis\n• Phishing Detection",
-            'profile_gen': "• UK Identity Generation\n• Document Number Creation\n• Address Generation\n• Contact Details",
-            'marketing': "• Campaign Strategy\n• Audience Analysis\n• Luxury Marketing\n• International Strategies",
-            'assistant': "• General Analysis\n• Research Support\n• Writing Assistance\n• Problem Solving"
-        }
-        return tools_map.get(model_id, "• General AI Assistance")
+        return _TOOLS_BY_MODEL.get(model_id, "• General AI Assistance")
     
     async def handle_generation_request(self, query, user_id):
         """Handle generation requests using modular generators"""
@@ -574,79 +943,79 @@ class BotHandlers:
         
         elif request_type == "roi_calc":
             await query.edit_message_text(
-                f"💎 *Property Investment Calculator Ready*\n\n"
-                f"I'm ready to help you calculate property investment returns.\n\n"
-                f"**Please provide:**\n"
-                f"• Purchase price\n"
-                f"• Expected rental income (monthly)\n"
-                f"• Renovation costs\n"
-                f"• Holding period\n\n"
-                f"*Next Step:* Send your property details as a message and I'll calculate comprehensive ROI analysis.",
+                "💎 *Property Investment Calculator Ready*\n\n"
+                "I'm ready to help you calculate property investment returns.\n\n"
+                "**Please provide:**\n"
+                "• Purchase price\n"
+                "• Expected rental income (monthly)\n"
+                "• Renovation costs\n"
+                "• Holding period\n\n"
+                "*Next Step:* Send your property details as a message and I'll calculate comprehensive ROI analysis.",
                 parse_mode=ParseMode.MARKDOWN
             )
         
         elif request_type == "feasibility":
             await query.edit_message_text(
-                f"📋 *Property Feasibility Study Generator*\n\n"
-                f"I'll create a comprehensive feasibility study for your property development.\n\n"
-                f"**Please provide:**\n"
-                f"• Property location and type\n"
-                f"• Development plans\n"
-                f"• Budget range\n"
-                f"• Timeline requirements\n\n"
-                f"*Next Step:* Send your project details and I'll generate a professional feasibility analysis.",
+                "📋 *Property Feasibility Study Generator*\n\n"
+                "I'll create a comprehensive feasibility study for your property development.\n\n"
+                "**Please provide:**\n"
+                "• Property location and type\n"
+                "• Development plans\n"
+                "• Budget range\n"
+                "• Timeline requirements\n\n"
+                "*Next Step:* Send your project details and I'll generate a professional feasibility analysis.",
                 parse_mode=ParseMode.MARKDOWN
             )
         
         elif request_type == "cost_estimate":
             await query.edit_message_text(
-                f"💰 *Construction Cost Estimator*\n\n"
-                f"I'll provide detailed cost estimates for your property project.\n\n"
-                f"**I can estimate costs for:**\n"
-                f"• New builds\n"
-                f"• Renovations\n"
-                f"• Extensions\n"
-                f"• Commercial developments\n\n"
-                f"*Next Step:* Describe your project and I'll break down all costs.",
+                "💰 *Construction Cost Estimator*\n\n"
+                "I'll provide detailed cost estimates for your property project.\n\n"
+                "**I can estimate costs for:**\n"
+                "• New builds\n"
+                "• Renovations\n"
+                "• Extensions\n"
+                "• Commercial developments\n\n"
+                "*Next Step:* Describe your project and I'll break down all costs.",
                 parse_mode=ParseMode.MARKDOWN
             )
         
         elif request_type == "campaign":
             await query.edit_message_text(
-                f"📈 *Marketing Campaign Generator*\n\n"
-                f"I'll create a comprehensive marketing strategy for your business.\n\n"
-                f"**Campaign Types:**\n"
-                f"• Digital marketing strategies\n"
-                f"• Social media campaigns\n"
-                f"• Property marketing\n"
-                f"• Lead generation\n\n"
-                f"*Next Step:* Tell me about your business and target audience.",
+                "📈 *Marketing Campaign Generator*\n\n"
+                "I'll create a comprehensive marketing strategy for your business.\n\n"
+                "**Campaign Types:**\n"
+                "• Digital marketing strategies\n"
+                "• Social media campaigns\n"
+                "• Property marketing\n"
+                "• Lead generation\n\n"
+                "*Next Step:* Tell me about your business and target audience.",
                 parse_mode=ParseMode.MARKDOWN
             )
         
         elif request_type == "luxury_strategy":
             await query.edit_message_text(
-                f"💎 *Luxury Marketing Strategy*\n\n"
-                f"I'll develop high-end marketing approaches for luxury properties and services.\n\n"
-                f"**Specializes in:**\n"
-                f"• Ultra-high-net-worth targeting\n"
-                f"• Luxury property marketing\n"
-                f"• Exclusive brand positioning\n"
-                f"• Premium channel strategies\n\n"
-                f"*Next Step:* Describe your luxury offering and target market.",
+                "💎 *Luxury Marketing Strategy*\n\n"
+                "I'll develop high-end marketing approaches for luxury properties and services.\n\n"
+                "**Specializes in:**\n"
+                "• Ultra-high-net-worth targeting\n"
+                "• Luxury property marketing\n"
+                "• Exclusive brand positioning\n"
+                "• Premium channel strategies\n\n"
+                "*Next Step:* Describe your luxury offering and target market.",
                 parse_mode=ParseMode.MARKDOWN
             )
         
         elif request_type == "intl_strategy":
             await query.edit_message_text(
-                f"🌍 *International Marketing Strategy*\n\n"
-                f"I'll create cross-border marketing strategies for global expansion.\n\n"
-                f"**Global Expertise:**\n"
-                f"• Multi-market entry strategies\n"
-                f"• Cultural adaptation\n"
-                f"• International property investment\n"
-                f"• Cross-border compliance\n\n"
-                f"*Next Step:* Tell me about your target markets and expansion plans.",
+                "🌍 *International Marketing Strategy*\n\n"
+                "I'll create cross-border marketing strategies for global expansion.\n\n"
+                "**Global Expertise:**\n"
+                "• Multi-market entry strategies\n"
+                "• Cultural adaptation\n"
+                "• International property investment\n"
+                "• Cross-border compliance\n\n"
+                "*Next Step:* Tell me about your target markets and expansion plans.",
                 parse_mode=ParseMode.MARKDOWN
             )
     
@@ -815,14 +1184,15 @@ class BotHandlers:
         
         try:
             if export_type == "messages":
-                # Export message logs
-                export_file = self.dashboard.csv_exporter.export_messages_to_csv(list(self.dashboard.message_logs))
+                # Export message logs; the CSV is written on a worker thread to keep the loop free
+                messages = list(self.dashboard.message_logs)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_messages_to_csv, messages)
                 if export_file:
                     await query.edit_message_text(
                         "💬 *Messages Export Complete*\n\n"
                         f"✅ **Export Status:** Successful\n"
                         f"📁 **File:** {os.path.basename(export_file)}\n"
-                        f"📊 **Records:** {len(self.dashboard.message_logs)}\n"
+                        f"📊 **Records:** {len(messages)}\n"
                         f"🗓️ **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
                         "**Includes:**\n"
                         "• User messages and AI responses\n"
@@ -837,13 +1207,14 @@ class BotHandlers:
             
             elif export_type == "users":
                 # Export user statistics
-                export_file = self.dashboard.csv_exporter.export_users_to_csv(dict(self.dashboard.user_stats))
+                user_stats = dict(self.dashboard.user_stats)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_users_to_csv, user_stats)
                 if export_file:
                     await query.edit_message_text(
                         "👥 *Users Export Complete*\n\n"
                         f"✅ **Export Status:** Successful\n"
                         f"📁 **File:** {os.path.basename(export_file)}\n"
-                        f"👤 **Users:** {len(self.dashboard.user_stats)}\n"
+                        f"👤 **Users:** {len(user_stats)}\n"
                         f"🗓️ **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
                         "**Includes:**\n"
                         "• User activity statistics\n"
@@ -859,7 +1230,7 @@ class BotHandlers:
             elif export_type == "investigations":
                 # Export investigation data
                 investigations = self.dashboard._get_investigations_data()
-                export_file = self.dashboard.csv_exporter.export_investigations_to_csv(investigations)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_investigations_to_csv, investigations)
                 if export_file:
                     await query.edit_message_text(
                         "🔍 *Investigations Export Complete*\n\n"
@@ -881,7 +1252,7 @@ class BotHandlers:
             elif export_type == "companies":
                 # Export company data
                 companies = self.dashboard._get_companies_data()
-                export_file = self.dashboard.csv_exporter.export_companies_to_csv(companies)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_companies_to_csv, companies)
                 if export_file:
                     await query.edit_message_text(
                         "🏢 *Companies Export Complete*\n\n"
@@ -903,7 +1274,7 @@ class BotHandlers:
             elif export_type == "scams":
                 # Export scam analysis data
                 scams = self.dashboard._get_scams_data()
-                export_file = self.dashboard.csv_exporter.export_scams_to_csv(scams)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_scams_to_csv, scams)
                 if export_file:
                     await query.edit_message_text(
                         "🚨 *Scam Analysis Export Complete*\n\n"
@@ -925,7 +1296,7 @@ class BotHandlers:
             elif export_type == "profiles":
                 # Export profile data
                 profiles = self.dashboard._get_profiles_data()
-                export_file = self.dashboard.csv_exporter.export_profiles_to_csv(profiles)
+                export_file = await asyncio.to_thread(self.dashboard.csv_exporter.export_profiles_to_csv, profiles)
                 if export_file:
                     await query.edit_message_text(
                         "🆔 *Profiles Export Complete*\n\n"
@@ -947,7 +1318,7 @@ class BotHandlers:
             
             elif export_type == "view_files":
                 # Show available export files
-                files = self.dashboard.csv_exporter.get_export_files()
+                files = await asyncio.to_thread(self.dashboard.csv_exporter.get_export_files)
                 if files:
                     file_list = "\n".join([f"• {f['filename']} ({f['size']:,} bytes)" for f in files[:10]])
                     await query.edit_message_text(
@@ -979,325 +1350,372 @@ class BotHandlers:
     # Keep all existing methods (help_command, clear_command, handle_message, etc.)
     # but with enhanced system messages...
     
+    @require_auth
     async def models_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /models command to switch AI experts"""
-        user_id = update.effective_user.id
-        
-        if user_id not in self.authenticated_users:
-            await update.message.reply_text("🔐 Please use /start and enter the passcode first.", parse_mode=ParseMode.MARKDOWN)
-            return
-        
-        keyboard = []
-        for model_id, model_info in self.config.AI_MODELS.items():
-            button_text = f"{model_info['emoji']} {model_info['name']}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"model_{model_id}")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
-            "🔄 *Choose Your AI Expert:*\n\nSelect the specialist you'd like to work with:",
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.MARKDOWN
+            _MODELS_PROMPT_MSG,
+            reply_markup=self._models_markup,
+            parse_mode=ParseMode.HTML
         )
     
+    @require_auth
     async def current_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show current AI model"""
         user_id = update.effective_user.id
         
-        if user_id not in self.authenticated_users:
-            await update.message.reply_text("🔐 Please use /start and enter the passcode first.", parse_mode=ParseMode.MARKDOWN)
-            return
-            
-        current_model = self.user_models[user_id]
-        model_info = self.config.AI_MODELS[current_model]
-        
-        await update.message.reply_text(
-            f"🤖 *Current AI Expert:*\n\n"
-            f"{model_info['emoji']} *{model_info['name']}*\n"
-            f"Specialty: {model_info['description']}\n\n"
-            f"*Available Tools:*\n{self.get_tools_for_model(current_model)}\n\n"
-            f"Use `/models` to switch to a different expert.",
-            parse_mode=ParseMode.MARKDOWN
-        )
+        current_model = self.user_models.get(user_id, 'financial')
+        await update.message.reply_text(self._current_texts[current_model], parse_mode=ParseMode.MARKDOWN)
     
+    @require_auth
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
-        user_id = update.effective_user.id
-        
-        if user_id not in self.authenticated_users:
-            await update.message.reply_text("🔐 Please use /start and enter the passcode first.", parse_mode=ParseMode.MARKDOWN)
-            return
-        
-        help_message = (
-            "*🎯 WalshAI Professional Suite*\n\n"
-            "*🔧 Available AI Experts:*\n"
-        )
-        
-        for model_id, model_info in self.config.AI_MODELS.items():
-            help_message += f"• {model_info['emoji']} *{model_info['name']}*\n  {model_info['description']}\n\n"
-        
-        help_message += (
-            "*🛠️ Professional Tools:*\n"
-            "• **Financial Investigation Suite** - AML, transaction analysis, fraud detection\n"
-            "• **Property Development Tools** - ROI calculators, market analysis, feasibility studies\n"
-            "• **Company Intelligence Platform** - Business analysis, competitive intelligence\n"
-            "• **Scam Detection Database** - Fraud identification, protection strategies\n"
-            "• **UK Profile Generator** - Testing data creation (fictional profiles)\n"
-            "• **Marketing Analytics Suite** - Campaign strategy, audience analysis\n"
-            "• **Communication Tools** - Phishing analysis, SMTP to SMS, mass email\n"
-            "• **Data Export Suite** - CSV exports of all data and analytics\n\n"
-            "*📋 Commands:*\n"
-            "• `/start` - Main menu with expert selection and tools\n"
-            "• `/models` - Switch between AI experts\n"
-            "• `/current` - Show current AI expert and tools\n"
-            "• `/help` - Show this comprehensive help\n"
-            "• `/clear` - Clear conversation history\n\n"
-            "*⚖️ Security & Limits:*\n"
-            f"• Rate limit: {self.config.RATE_LIMIT_REQUESTS} requests per {self.config.RATE_LIMIT_WINDOW} seconds\n"
-            f"• Message limit: {self.config.MAX_MESSAGE_LENGTH} characters\n"
-            f"• Conversation history: {self.config.MAX_CONVERSATION_HISTORY} messages\n\n"
-            "🔒 *Privacy:* All conversations are encrypted and secure."
-        )
-        
-        await update.message.reply_text(help_message, parse_mode=ParseMode.MARKDOWN)
+        await update.message.reply_text(self._help_full, parse_mode=ParseMode.HTML)
     
+    @require_auth
     async def clear_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /clear command"""
         user_id = update.effective_user.id
         
-        if user_id not in self.authenticated_users:
-            await update.message.reply_text("🔐 Please use /start and enter the passcode first.", parse_mode=ParseMode.MARKDOWN)
-            return
+        if self._cancel_in_flight(user_id):
+            logger.info(f"Cancelled in-progress analysis for user {user_id}")
         
-        if user_id in self.conversations:
-            del self.conversations[user_id]
+        if await self.conversations.forget(user_id):
             logger.info(f"Cleared conversation history for user {user_id}")
         
-        await update.message.reply_text(
-            "🗑️ **Conversation & Analysis Data Cleared!**\n\n"
-            "• Conversation history cleared\n"
-            "• Investigation data reset\n"
-            "• Generated profiles cleared\n"
-            "• Analysis cache reset\n\n"
-            "You can start fresh with any AI expert or tools!",
-            parse_mode=ParseMode.MARKDOWN
-        )
+        await update.message.reply_text(_CLEARED_MSG, parse_mode=ParseMode.HTML)
     
     async def handle_clear_callback(self, query, update):
         """Handle clear button callback"""
         user_id = update.effective_user.id
         
-        if user_id in self.conversations:
-            del self.conversations[user_id]
+        self._cancel_in_flight(user_id)
+        await self.conversations.forget(user_id)
         
-        await query.edit_message_text(
-            "🗑️ *Professional Data Cleared!*\n\n"
-            "Your conversation history and analysis data has been cleared.\n"
-            "You can start fresh with any expert or tool.",
-            parse_mode=ParseMode.MARKDOWN
-        )
+        await query.edit_message_text(_CLEARED_CALLBACK_MSG, parse_mode=ParseMode.MARKDOWN)
     
     async def handle_current_callback(self, query, update):
         """Handle current model button callback"""
         user_id = update.effective_user.id
-        current_model = self.user_models[user_id]
-        model_info = self.config.AI_MODELS[current_model]
-        
-        await query.edit_message_text(
-            f"🤖 *Current AI Expert:*\n\n"
-            f"{model_info['emoji']} *{model_info['name']}*\n"
-            f"Specialty: {model_info['description']}\n\n"
-            f"*Available Professional Tools:*\n"
-            f"{self.get_tools_for_model(current_model)}\n\n"
-            f"Send your professional queries to this expert!",
-            parse_mode=ParseMode.MARKDOWN
-        )
+        current_model = self.user_models.get(user_id, 'financial')
+        await query.edit_message_text(self._current_callback_texts[current_model], parse_mode=ParseMode.MARKDOWN)
     
     async def start_command_callback(self, query, user_id):
         """Handle return to main menu from callback"""
-        current_model = self.user_models[user_id]
+        current_model = self.user_models.get(user_id, 'financial')
         model_info = self.config.AI_MODELS[current_model]
         
-        # Same keyboard as start_command but for callback
-        keyboard = []
-        
-        keyboard.append([
-            InlineKeyboardButton("🔍 Financial Expert", callback_data="model_financial"),
-            InlineKeyboardButton("🤖 General Assistant", callback_data="model_assistant")
-        ])
-        
-        keyboard.append([
-            InlineKeyboardButton("🏗️ Property Expert", callback_data="model_property"),
-            InlineKeyboardButton("🏢 Company Expert", callback_data="model_cloner")
-        ])
-        
-        keyboard.append([
-            InlineKeyboardButton("📈 Marketing Expert", callback_data="model_marketing"),
-            InlineKeyboardButton("🚨 Scam Expert", callback_data="model_scam_search")
-        ])
-        
-        keyboard.append([
-            InlineKeyboardButton("🆔 Profile Generator", callback_data="model_profile_gen")
-        ])
-        
-        keyboard.append([
-            InlineKeyboardButton("📋 Help", callback_data="help"),
-            InlineKeyboardButton("🗑️ Clear History", callback_data="clear")
-        ])
-        
-        keyboard.append([
-            InlineKeyboardButton("🔄 Current Expert", callback_data="current"),
-            InlineKeyboardButton("🌐 Dashboard", url="http://0.0.0.0:5000")
-        ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        welcome_message = (
-            f"🎯 *Welcome to WalshAI Professional Suite!*\n\n"
-            f"Your comprehensive AI toolkit with expert capabilities.\n\n"
-            f"*Current Expert:* {model_info['emoji']} {model_info['name']}\n\n"
-            f"Choose an expert below and start chatting! 🚀"
-        )
+        welcome_message = _MAIN_MENU_TEMPLATE.format(emoji=model_info['emoji'], name=model_info['name'])
         
         await query.edit_message_text(
             welcome_message, 
-            reply_markup=reply_markup,
+            reply_markup=self._start_markup,
             parse_mode=ParseMode.MARKDOWN
         )
     
     async def handle_help_callback(self, query, update):
         """Handle help button callback"""
-        help_message = (
-            "*🎯 WalshAI Professional Suite*\n\n"
-            "*🔧 AI Experts Available:*\n"
-        )
+        await query.edit_message_text(self._help_short, parse_mode=ParseMode.HTML)
+    
+    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Queue incoming text messages for the sender's dedicated worker"""
+        user_id = update.effective_user.id
         
-        for model_id, model_info in self.config.AI_MODELS.items():
-            help_message += f"• {model_info['emoji']} *{model_info['name']}*\n  {model_info['description']}\n\n"
-        
-        help_message += (
-            "*🛠️ Professional Tool Suite:*\n"
-            "• Financial Investigation & AML Compliance\n"
-            "• Property Development & Investment Analysis\n"
-            "• Company Intelligence & Business Analysis\n"
-            "• Scam Detection & Security Assessment\n"
-            "• UK Profile Generation (Testing)\n"
-            "• Marketing Analytics & Strategy\n\n"
-            "*💡 Usage:*\n"
-            "• Select experts for specialized knowledge\n"
-            "• Access professional tools via /start menu\n"
-            "• Each expert has dedicated analysis tools\n"
-            "• All data processing is secure and professional\n\n"
-            "🔒 *Enterprise-Grade Security & Privacy*"
-        )
+        queue = self.user_queues.get(user_id)
+        if queue is None:
+            queue = self.user_queues[user_id] = asyncio.Queue(maxsize=5)
         
-        await query.edit_message_text(help_message, parse_mode=ParseMode.MARKDOWN)
+        try:
+            queue.put_nowait((update, context))
+        except asyncio.QueueFull:
+            await update.message.reply_text(_STILL_WORKING_MSG, parse_mode=ParseMode.HTML)
+            return
+        
+        # Spawn a worker on first access (or after the previous one drained)
+        if user_id not in self.user_workers:
+            self.user_workers[user_id] = asyncio.create_task(self._user_worker(user_id, queue))
     
-    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def _user_worker(self, user_id: int, queue: asyncio.Queue):
+        """Process one user's queued messages sequentially until the queue drains"""
+        try:
+            while not queue.empty():
+                update, context = queue.get_nowait()
+                try:
+                    await self._process_message(update, context)
+                except Exception as e:
+                    logger.error(f"Error processing queued message for user {user_id}: {e}")
+                finally:
+                    queue.task_done()
+        finally:
+            # A cancelled worker may already have been replaced by a fresh one
+            if self.user_workers.get(user_id) is asyncio.current_task():
+                del self.user_workers[user_id]
+    
+    async def sweep_idle_users(self, context: ContextTypes.DEFAULT_TYPE):
+        """Drop per-user state that would be recreated identically on the next message"""
+        now = time.monotonic()
+        
+        # A bucket that has refilled completely is the same as the fresh one is_rate_limited makes
+        idle_buckets = [
+            user_id for user_id, (tokens, updated) in self.user_buckets.items()
+            if tokens + (now - updated) * self._refill_per_second >= self._rate_capacity
+        ]
+        for user_id in idle_buckets:
+            del self.user_buckets[user_id]
+        
+        # Queues with nothing pending and no worker are created again on demand
+        idle_queues = [
+            user_id for user_id, queue in self.user_queues.items()
+            if queue.empty() and user_id not in self.user_workers
+        ]
+        for user_id in idle_queues:
+            del self.user_queues[user_id]
+        
+        if idle_buckets or idle_queues:
+            logger.info(f"Swept idle state: {len(idle_buckets)} rate buckets, {len(idle_queues)} message queues")
+    
+    def _cancel_in_flight(self, user_id: int) -> bool:
+        """Stop any reply still being generated for a user and drop their queued messages"""
+        self.user_queues.pop(user_id, None)
+        worker = self.user_workers.pop(user_id, None)
+        if worker is None:
+            return False
+        # Cancelling the worker closes the DeepSeek stream mid-generation
+        worker.cancel()
+        return True
+    
+    def _spawn_background(self, coro) -> asyncio.Task:
+        """Run a coroutine in the background, holding a reference until it completes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    def _log_to_dashboard(self, **entry):
+        """Queue a message log entry, starting the batch writer if it isn't running"""
+        self._dashboard_events.append(entry)
+        if self._dashboard_writer is None:
+            self._dashboard_writer = self._spawn_background(self._write_dashboard_events())
+    
+    async def _write_dashboard_events(self):
+        """Hand queued log entries to the dashboard in batches until none are left"""
+        try:
+            while self._dashboard_events:
+                await asyncio.sleep(_DASHBOARD_FLUSH_INTERVAL)
+                batch, self._dashboard_events = self._dashboard_events, []
+                try:
+                    await asyncio.to_thread(self.dashboard.log_batch, batch)
+                except Exception as e:
+                    logger.error(f"Failed to log {len(batch)} messages to dashboard: {e}")
+        finally:
+            self._dashboard_writer = None
+    
+    async def _send_remaining_chunks(self, message, chunks, user_id: int):
+        """Send the rest of a long response in order"""
+        try:
+            for chunk in chunks:
+                await message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
+        except Exception as e:
+            logger.error(f"Failed to send response chunk to user {user_id}: {e}")
+    
+    async def _keep_typing(self, bot, chat_id: int):
+        """Repeat the typing action until cancelled (Telegram clears it after about 5 seconds)"""
+        while True:
+            try:
+                await bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+            except TelegramError as e:
+                logger.debug(f"Skipped typing indicator: {e}")
+            await asyncio.sleep(4)
+    
+    def _trim_history(self, conversation: deque):
+        """Drop the oldest turns until the history fits the token budget, always keeping the newest message"""
+        total = sum(_estimate_tokens(turn.content) for turn in conversation)
+        while total > self._max_history_tokens and len(conversation) > 1:
+            total -= _estimate_tokens(conversation.popleft().content)
+            # Drop the paired reply too so history never opens with an assistant turn
+            if len(conversation) > 1 and conversation[0].role == 'assistant':
+                total -= _estimate_tokens(conversation.popleft().content)
+    
+    @staticmethod
+    def _response_cache_key(model_id: str, conversation: Iterable[ChatTurn]) -> str:
+        """Hash a request into a stable cache key, ignoring case, spacing, edge punctuation and Unicode form differences"""
+        # The expert's static system prompt is fully identified by model_id
+        turns = [(role, _canonicalize(content)) for role, content in conversation]
+        payload = json.dumps([model_id, turns], separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def _show_stream_progress(self, message, placeholder, text: str):
+        """Post or refresh the in-progress reply while a response streams in"""
+        # Partial Markdown is often unbalanced, so progress is shown as plain text
+        preview = text[:4000] + " …"
+        try:
+            if placeholder is None:
+                return await message.reply_text(preview)
+            await placeholder.edit_text(preview)
+        except TelegramError as e:
+            logger.debug("Skipped streaming update: %s", e)
+        return placeholder
+    
+    async def _deliver(self, message, placeholder, text: str, parse_mode: str = ParseMode.MARKDOWN):
+        """Send the final reply, replacing the streaming placeholder if there is one"""
+        if placeholder is None:
+            await message.reply_text(text, parse_mode=parse_mode)
+        else:
+            await placeholder.edit_text(text, parse_mode=parse_mode)
+    
+    async def _process_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle regular text messages with enhanced AI expert capabilities"""
+        # Bind once; Update resolves these through properties on every access
+        message = update.message
         user = update.effective_user
         user_id = user.id
-        message_text = update.message.text
+        message_text = message.text
         
-        logger.info(f"Received message from user {user_id} ({user.username}): {message_text[:100]}...")
+        # Check rate limiting first - it is the cheapest rejection
+        if self.is_rate_limited(user_id):
+            if self.dashboard:
+                self.dashboard.log_rate_limit()
+            await message.reply_text(self._rate_limit_msg, parse_mode=ParseMode.HTML)
+            return
         
         # Check if user is authenticated
         if user_id not in self.authenticated_users:
-            if message_text.strip() == self.REQUIRED_PASSCODE:
+            passcode = message_text.strip()
+            if (len(passcode) == len(self.REQUIRED_PASSCODE)
+                    and hmac.compare_digest(passcode.encode(), self.REQUIRED_PASSCODE.encode())):
                 self.authenticated_users.add(user_id)
-                await update.message.reply_text(
-                    "✅ *Access Granted!*\n\n"
-                    "Welcome to WalshAI Professional Suite!\n\n"
-                    "🎯 **Your AI experts and professional tools are now available**\n\n"
-                    "Use /start to access the full suite of professional tools and AI experts.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
+                self.storage.add_authenticated_user(user_id)
+                await message.reply_text(_ACCESS_GRANTED_MSG, parse_mode=ParseMode.HTML)
                 logger.info(f"User {user_id} successfully authenticated")
                 return
             else:
-                await update.message.reply_text(
-                    "❌ *Incorrect Passcode*\n\n"
-                    "Please enter the correct 4-digit passcode to access WalshAI Professional Suite.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
+                await message.reply_text(_INCORRECT_PASSCODE_MSG, parse_mode=ParseMode.HTML)
                 logger.warning(f"User {user_id} entered incorrect passcode: {message_text}")
                 return
         
-        # Check rate limiting
-        if self.is_rate_limited(user_id):
-            if self.dashboard:
-                self.dashboard.log_rate_limit()
-            await update.message.reply_text(
-                "⏰ **Rate Limit Exceeded**\n\n"
-                f"Professional tools have usage limits to ensure quality service.\n"
-                f"Please wait before sending another request.\n\n"
-                f"*Limit:* {self.config.RATE_LIMIT_REQUESTS} requests per {self.config.RATE_LIMIT_WINDOW} seconds",
-                parse_mode=ParseMode.MARKDOWN
+        # Check message length
+        if len(message_text) > self._max_message_length:
+            await message.reply_text(
+                self._too_long_template.format(length=len(message_text)),
+                parse_mode=ParseMode.HTML
             )
             return
         
-        # Check message length
-        if len(message_text) > self.config.MAX_MESSAGE_LENGTH:
-            await update.message.reply_text(
-                f"📝 **Message Too Long**\n\n"
-                f"Please keep your professional queries under {self.config.MAX_MESSAGE_LENGTH} characters.\n"
-                f"Current length: {len(message_text)} characters\n\n"
-                f"*Tip:* Break complex queries into smaller, focused questions.",
+        # Screen for prompt injection before spending any tokens
+        injection = detect_prompt_injection(message_text)
+        if injection:
+            await message.reply_text(_INJECTION_BLOCKED_MSG, parse_mode=ParseMode.HTML)
+            logger.warning(f"Blocked possible prompt injection from user {user_id}: {injection[:100]}")
+            return
+        
+        # Read-only probe: users who never picked an expert get no entry of their own
+        current_model = self.user_models.get(user_id, 'financial')
+        
+        # Answer small talk locally; it doesn't need the expert model or its large prompt
+        small_talk = message_text.strip()
+        if _GREETING_RE.fullmatch(small_talk):
+            model_info = self.config.AI_MODELS[current_model]
+            await message.reply_text(
+                _GREETING_TEMPLATE.format(emoji=model_info['emoji'], name=model_info['name']),
                 parse_mode=ParseMode.MARKDOWN
             )
             return
+        if _THANKS_RE.fullmatch(small_talk):
+            await message.reply_text(_THANKS_MSG)
+            return
         
-        # Send enhanced typing indicator
-        asyncio.create_task(
-            context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
-        )
+        # Lazy %-formatting: nothing is rendered when INFO is disabled
+        logger.info("Received message from user %s (%s): %.100s...", user_id, user.username, message_text)
+        
+        # Keep the typing indicator up while the reply is generated (runs alongside the API call)
+        typing_task = asyncio.create_task(self._keep_typing(context.bot, message.chat_id))
         
         try:
             # Get conversation history
-            conversation = self.conversations[user_id]
-            
-            # Add user message to conversation
-            conversation.append({"role": "user", "content": message_text})
+            conversation = await self.conversations.load(user_id)
             
-            # Limit conversation history
-            max_history = min(self.config.MAX_CONVERSATION_HISTORY, 8) * 2
-            if len(conversation) > max_history:
-                conversation = conversation[-max_history:]
-                self.conversations[user_id] = conversation
+            # Add user message to conversation (deque maxlen limits history)
+            conversation.append(ChatTurn('user', message_text))
+            self._trim_history(conversation)
             
-            # Get current AI model
-            current_model = self.user_models[user_id]
-            
-            # Prepare enhanced messages with professional system prompt
+            # Prepare enhanced messages with professional system prompt.
+            # The static prompt must stay first and unchanged so the API can cache the prefix;
+            # any per-user context belongs in a later message, never ahead of it.
             system_message = self.get_enhanced_system_message_for_model(current_model)
-            messages = [system_message] + conversation
+            messages = [system_message, *({"role": role, "content": content} for role, content in conversation)]
             
             # Get optimized AI parameters for current model
             model_params = AIModelConfig.get_model_parameters(current_model)
             
-            # Get AI response with professional analysis
-            response = await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: self.deepseek_client.create_chat_completion(
-                        messages,
-                        temperature=model_params['temperature'],
-                        max_tokens=model_params['max_tokens']
-                    )
-                ),
-                timeout=35.0  # Reduced timeout for faster responses
-            )
+            # Identical requests (same expert, history and message) reuse the cached answer
+            placeholder = None
+            # Text received so far when the stream broke off before the API finished the reply
+            partial = None
+            cache_key = self._response_cache_key(current_model, conversation)
+            response = self._response_cache.get(cache_key)
+            
+            if response is None:
+                flight = self._inflight.get(cache_key)
+                if flight is not None:
+                    # The same request is already streaming for someone else; share its answer
+                    async with asyncio.timeout(35.0):
+                        response = await asyncio.shield(flight)
+            
+            if response is None:
+                loop = asyncio.get_running_loop()
+                flight = self._inflight[cache_key] = loop.create_future()
+                try:
+                    # Stream AI response, showing progress in a placeholder message
+                    parts = []
+                    last_edit = 0.0
+                    try:
+                        async with asyncio.timeout(35.0):  # Reduced timeout for faster responses
+                            async for delta in self.deepseek_client.stream_chat_completion(
+                                messages,
+                                temperature=model_params['temperature'],
+                                max_tokens=model_params['max_tokens']
+                            ):
+                                parts.append(delta)
+                                now = loop.time()
+                                if now - last_edit >= _STREAM_EDIT_INTERVAL:
+                                    last_edit = now
+                                    placeholder = await self._show_stream_progress(message, placeholder, ''.join(parts))
+                    except (StreamInterruptedError, asyncio.TimeoutError):
+                        # Before any text arrives a timeout gets the usual timeout reply
+                        if not parts:
+                            raise
+                        partial = ''.join(parts).strip()
+                    else:
+                        response = ''.join(parts).strip() or None
+                    
+                    # Only a reply the API finished is cached, shared or (below) saved to history;
+                    # a cut-off one would otherwise be served to every later identical question
+                    if partial is None and response and not response.startswith(_ERROR_PREFIXES):
+                        self._response_cache[cache_key] = response
+                finally:
+                    # Followers get None if this call failed, broke off or returned an error string
+                    # and then make their own, so one transient error isn't sent to every waiting request
+                    if self._inflight.get(cache_key) is flight:
+                        del self._inflight[cache_key]
+                    complete = partial is None and response and not response.startswith(_ERROR_PREFIXES)
+                    flight.set_result(response if complete else None)
             
-            if response and not response.startswith('❌') and not response.startswith('⏰') and not response.startswith('🌐'):
+            if partial is not None:
+                # Show what arrived, plainly marked as cut off; it isn't saved to the history
+                await self._deliver(message, placeholder, partial[:3800] + _INCOMPLETE_NOTICE, None)
+                logger.warning(f"Incomplete streamed reply for user {user_id} ({len(partial)} chars)")
+                
+            elif response and not response.startswith(_ERROR_PREFIXES):
                 # Add professional analysis indicators
                 response = self.enhance_response_with_tools(response, current_model, message_text)
                 
-                # Add assistant response to conversation
-                conversation.append({"role": "assistant", "content": response})
+                # Add assistant response to conversation and persist the completed turn
+                conversation.append(ChatTurn('assistant', response))
+                self.conversations.save(user_id, conversation)
                 
-                # Log to dashboard
+                # Log to dashboard off the reply path
                 if self.dashboard:
-                    self.dashboard.log_message(
+                    self._log_to_dashboard(
                         user_id=user_id,
                         username=user.username or f"user_{user_id}",
                         message=message_text,
@@ -1306,81 +1724,45 @@ class BotHandlers:
                     )
                 
                 # Send enhanced response
-                if len(response) > 4000:
-                    chunks = [response[i:i+3800] for i in range(0, len(response), 3800)]
-                    for i, chunk in enumerate(chunks):
-                        if i == 0:
-                            chunk = f"🎯 **{self.config.AI_MODELS[current_model]['name']} Analysis** (Part {i+1}/{len(chunks)})\n\n{chunk}"
-                        await update.message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
+                model_name = self.config.AI_MODELS[current_model]['name']
+                if _utf16_len(response) > 4000:
+                    chunks = _split_message(response)
+                    first_chunk = f"🎯 **{model_name} Analysis** (Part 1)\n\n{next(chunks)}"
+                    await self._deliver(message, placeholder, first_chunk)
+                    # Remaining parts go out in order without holding up the user's queue
+                    self._spawn_background(self._send_remaining_chunks(message, chunks, user_id))
                 else:
-                    enhanced_response = f"🎯 **{self.config.AI_MODELS[current_model]['name']} Analysis**\n\n{response}"
-                    await update.message.reply_text(enhanced_response, parse_mode=ParseMode.MARKDOWN)
+                    enhanced_response = f"🎯 **{model_name} Analysis**\n\n{response}"
+                    await self._deliver(message, placeholder, enhanced_response)
                 
-                logger.info(f"Successfully provided professional analysis to user {user_id} using {current_model} expert")
+                logger.info("Successfully provided professional analysis to user %s using %s expert", user_id, current_model)
                 
-            elif response and (response.startswith('❌') or response.startswith('⏰') or response.startswith('🌐') or response.startswith('🔒')):
+            elif response:
                 # Enhanced error message for connection issues
-                if response.startswith('🌐') or response.startswith('🔒'):
-                    enhanced_error = (
-                        f"🔧 **Connection Issue Detected**\n\n"
-                        "The AI service is temporarily unavailable. This could be due to:\n"
-                        "• DeepSeek API credits may be low\n"
-                        "• Network connectivity issues\n"
-                        "• API service maintenance\n\n"
-                        "**Quick Solutions:**\n"
-                        "1. Check your DeepSeek credits at platform.deepseek.com\n"
-                        "2. Try again in a few moments\n"
-                        "3. Use /start to access the menu\n\n"
-                        "**Status:** AI experts will be restored once connection is reestablished."
-                    )
-                    await update.message.reply_text(enhanced_error, parse_mode=ParseMode.MARKDOWN)
+                if response.startswith(_CONNECTION_ERROR_PREFIXES):
+                    await self._deliver(message, placeholder, _CONNECTION_ERROR_MSG, ParseMode.HTML)
                 else:
-                    await update.message.reply_text(response, parse_mode=ParseMode.MARKDOWN)
+                    await self._deliver(message, placeholder, response)
                 logger.warning(f"API client returned error for user {user_id}: {response[:100]}...")
                 
             else:
-                await update.message.reply_text(
-                    "💳 **Professional Service Temporarily Unavailable**\n\n"
-                    "The AI expert service requires additional credits:\n\n"
-                    "🔧 **Resolution Steps:**\n"
-                    "1. Visit [DeepSeek Platform](https://platform.deepseek.com)\n"
-                    "2. Add credits to your professional account\n"
-                    "3. Wait 2-3 minutes for service activation\n"
-                    "4. Retry your professional query\n\n"
-                    "💡 **Note:** Professional AI experts require active API credits for analysis.",
-                    parse_mode=ParseMode.MARKDOWN
-                )
+                await message.reply_text(_CREDITS_MSG, parse_mode=ParseMode.HTML)
                 logger.warning(f"Credits/API issue for user {user_id} - professional service unavailable")
         
         except asyncio.TimeoutError:
             logger.error(f"Timeout during professional analysis for user {user_id}")
             if self.dashboard:
                 self.dashboard.log_error()
-            await update.message.reply_text(
-                "⏰ **Professional Analysis Timeout**\n\n"
-                "Your query requires complex professional analysis that exceeded the time limit.\n\n"
-                "**Optimization Tips:**\n"
-                "• Break complex queries into focused questions\n"
-                "• Use specific professional terminology\n"
-                "• Try again with simplified requirements\n\n"
-                "**Status:** Professional AI experts are operational",
-                parse_mode=ParseMode.MARKDOWN
-            )
+            await message.reply_text(_TIMEOUT_MSG, parse_mode=ParseMode.HTML)
         
         except Exception as e:
             logger.error(f"Error in professional analysis for user {user_id}: {e}")
             if self.dashboard:
                 self.dashboard.log_error()
-            await update.message.reply_text(
-                "❌ **Professional System Error**\n\n"
-                "An error occurred during professional analysis.\n\n"
-                "**Recovery Options:**\n"
-                "• Use /clear to reset professional analysis state\n"
-                "• Try switching AI experts with /models\n"
-                "• Contact support if issue persists\n\n"
-                "**Status:** Professional tools are being restored",
-                parse_mode=ParseMode.MARKDOWN
-            )
+            await message.reply_text(_GENERIC_ERROR_MSG, parse_mode=ParseMode.HTML)
+        
+        finally:
+            typing_task.cancel()
     
     def enhance_response_with_tools(self, response: str, model_id: str, query: str) -> str:
         """Enhance response with professional tool indicators using modular config"""
@@ -1391,9 +1773,8 @@ class BotHandlers:
         comm_keywords = ['phishing', 'sms:', 'email:', 'smtp', 'security check', 'threat', 'suspicious']
         if any(keyword in query_lower for keyword in comm_keywords):
             if model_id == 'scam_search':
-                response += f"\n\n📧 *Analysis completed using Communication Security Suite*"
+                response += "\n\n📧 *Analysis completed using Communication Security Suite*"
         elif any(keyword in query_lower for keyword in tool_keywords):
-            model_info = self.config.get_model_config(model_id)
             tool_name = {
                 'financial': '🔍 *Analysis completed using Financial Investigation Suite tools*',
                 'property': '🏗️ *Analysis completed using Property Development Suite tools*',
@@ -1420,14 +1801,18 @@ class BotHandlers:
             try:
                 await context.bot.send_message(
                     chat_id=update.effective_chat.id,
-                    text="🔧 **Professional System Error**\n\n"
-                         "A technical error occurred in the professional AI system.\n\n"
-                         "**Recovery Options:**\n"
-                         "• Use /clear to reset the system\n"
-                         "• Try /start to access tools menu\n"
-                         "• Switch AI experts with /models\n\n"
-                         "**Status:** Professional tools are being restored",
-                    parse_mode=ParseMode.MARKDOWN
+                    text=_SYSTEM_ERROR_MSG,
+                    parse_mode=ParseMode.HTML
                 )
             except Exception as e:
                 logger.error(f"Failed to send professional error message: {e}")
+
+    async def shutdown(self, application):
+        """Release pooled connections and the database once polling has stopped"""
+        if self._dashboard_writer is not None:
+            await self._dashboard_writer
+        await self.deepseek_client.aclose()
+        self.deepseek_client.close()
+        await asyncio.to_thread(self.conversations.close)
+        self.storage.close()
+        logger.info("Bot resources released")
@@ -1,12 +1,40 @@
 
 import requests
+import copy
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 import os
 from datetime import datetime
 
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    # Optional C-accelerated JSON; the stdlib is used when it isn't installed
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Company records change rarely; a name lookup is reused for an hour, raw records for ten minutes
+_LOOKUP_CACHE_TTL = 3600
+_RECORD_CACHE_TTL = 600
+_CACHE_SIZE = 1024
+
+# Registered office address fields, in the order they're printed
+_ADDRESS_FIELDS = ('address_line_1', 'address_line_2', 'locality', 'region', 'postal_code', 'country')
+
+
+def _json(response: requests.Response):
+    """Decode a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 class CompaniesHouseAPI:
     """Real Companies House API integration for fetching company data"""
     
@@ -15,6 +43,30 @@ class CompaniesHouseAPI:
         self.base_url = "https://api.company-information.service.gov.uk"
         self.session = requests.Session()
         
+        # Keep connections to the API host open between lookups and retry transient server errors.
+        # 429 isn't retried: the rate-limit window lasts minutes, longer than any quick backoff.
+        retry_strategy = Retry(
+            total=3,
+            status_forcelist=[500, 502, 503, 504],
+            backoff_factor=0.3,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=20,
+            max_retries=retry_strategy
+        )
+        self.session.mount("https://", adapter)
+        
+        # Successful results only, so a transient failure is retried on the next call.
+        # Entries are stored and handed out as deep copies, so a caller that adds fields
+        # to a result (the dashboard's clone path does) can't change it for later lookups.
+        # cachetools caches aren't thread-safe and Flask serves requests on threads.
+        self._lookup_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=_LOOKUP_CACHE_TTL)
+        self._profile_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=_RECORD_CACHE_TTL)
+        self._officers_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=_RECORD_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        
         if self.api_key:
             # Use API key for authentication
             self.session.auth = (self.api_key, '')
@@ -33,7 +85,7 @@ class CompaniesHouseAPI:
             response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json(response)
                 return data.get('items', [])
             else:
                 logger.error(f"Companies House search failed: {response.status_code}")
@@ -45,13 +97,21 @@ class CompaniesHouseAPI:
     
     def get_company_profile(self, company_number: str) -> Optional[Dict]:
         """Get detailed company profile by company number"""
+        with self._cache_lock:
+            cached = self._profile_cache.get(company_number)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             url = f"{self.base_url}/company/{company_number}"
             
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                return response.json()
+                profile = _json(response)
+                with self._cache_lock:
+                    self._profile_cache[company_number] = copy.deepcopy(profile)
+                return profile
             else:
                 logger.error(f"Failed to get company profile: {response.status_code}")
                 return None
@@ -62,14 +122,22 @@ class CompaniesHouseAPI:
     
     def get_company_officers(self, company_number: str) -> List[Dict]:
         """Get company officers/directors"""
+        with self._cache_lock:
+            cached = self._officers_cache.get(company_number)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             url = f"{self.base_url}/company/{company_number}/officers"
             
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get('items', [])
+                data = _json(response)
+                officers = data.get('items', [])
+                with self._cache_lock:
+                    self._officers_cache[company_number] = copy.deepcopy(officers)
+                return officers
             else:
                 logger.error(f"Failed to get company officers: {response.status_code}")
                 return []
@@ -87,7 +155,7 @@ class CompaniesHouseAPI:
             response = self.session.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json(response)
                 return data.get('items', [])
             else:
                 logger.error(f"Failed to get filing history: {response.status_code}")
@@ -99,6 +167,13 @@ class CompaniesHouseAPI:
     
     def lookup_company_comprehensive(self, company_name: str) -> Dict:
         """Comprehensive company lookup with real data"""
+        # Case and spacing don't change which company a search finds
+        cache_key = ' '.join(company_name.split()).casefold()
+        with self._cache_lock:
+            cached = self._lookup_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
             # First, search for the company
             search_results = self.search_companies(company_name)
@@ -121,9 +196,11 @@ class CompaniesHouseAPI:
                     'company_name': company_name
                 }
             
-            # Get detailed company profile
-            profile = self.get_company_profile(company_number)
-            officers = self.get_company_officers(company_number)
+            # Get detailed company profile, fetching officers alongside since neither depends on the other
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                officers_future = executor.submit(self.get_company_officers, company_number)
+                profile = self.get_company_profile(company_number)
+                officers = officers_future.result()
             
             if not profile:
                 return {
@@ -134,20 +211,7 @@ class CompaniesHouseAPI:
             
             # Format the response with real data
             registered_address = profile.get('registered_office_address', {})
-            address_parts = []
-            
-            if registered_address.get('address_line_1'):
-                address_parts.append(registered_address['address_line_1'])
-            if registered_address.get('address_line_2'):
-                address_parts.append(registered_address['address_line_2'])
-            if registered_address.get('locality'):
-                address_parts.append(registered_address['locality'])
-            if registered_address.get('region'):
-                address_parts.append(registered_address['region'])
-            if registered_address.get('postal_code'):
-                address_parts.append(registered_address['postal_code'])
-            if registered_address.get('country'):
-                address_parts.append(registered_address['country'])
+            address_parts = [registered_address[field] for field in _ADDRESS_FIELDS if registered_address.get(field)]
             
             formatted_address = ', '.join(address_parts) if address_parts else 'Address not available'
             
@@ -166,7 +230,7 @@ class CompaniesHouseAPI:
             if sic_codes:
                 industry = f"SIC: {', '.join(sic_codes[:2])}"  # Show first 2 SIC codes
             
-            return {
+            result = {
                 'success': True,
                 'company_name': profile.get('company_name', company_name),
                 'company_number': company_number,
@@ -188,6 +252,10 @@ class CompaniesHouseAPI:
                 }
             }
             
+            with self._cache_lock:
+                self._lookup_cache[cache_key] = copy.deepcopy(result)
+            return result
+            
         except Exception as e:
             logger.error(f"Error in comprehensive company lookup: {e}")
             return {
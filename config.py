@@ -5,6 +5,7 @@ Configuration management for the Telegram Bot with enhanced validation
 
 import os
 import logging
+import functools
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -13,6 +14,15 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Settings that must be non-empty, and numeric settings with their lower bounds
+_REQUIRED_SETTINGS = ('TELEGRAM_BOT_TOKEN', 'DEEPSEEK_API_KEY')
+_MINIMUM_SETTINGS = (
+    ('MAX_MESSAGE_LENGTH', 100, "MAX_MESSAGE_LENGTH must be at least 100"),
+    ('MAX_CONVERSATION_HISTORY', 1, "MAX_CONVERSATION_HISTORY must be at least 1"),
+    ('MAX_HISTORY_TOKENS', 500, "MAX_HISTORY_TOKENS must be at least 500"),
+    ('REQUEST_TIMEOUT', 5, "REQUEST_TIMEOUT must be at least 5 seconds"),
+)
+
 class Config:
     """Enhanced configuration class with validation and type safety"""
     
@@ -32,6 +42,7 @@ class Config:
         # Performance Configuration
         self.MAX_MESSAGE_LENGTH = self._get_env_int('MAX_MESSAGE_LENGTH', 3000)
         self.MAX_CONVERSATION_HISTORY = self._get_env_int('MAX_CONVERSATION_HISTORY', 6)
+        self.MAX_HISTORY_TOKENS = self._get_env_int('MAX_HISTORY_TOKENS', 4000)
         self.REQUEST_TIMEOUT = self._get_env_int('REQUEST_TIMEOUT', 30)
         self.MAX_RETRIES = self._get_env_int('MAX_RETRIES', 2)
         
@@ -49,13 +60,12 @@ class Config:
         self.DASHBOARD_HOST = self._get_env_var('DASHBOARD_HOST', '0.0.0.0')
         self.DASHBOARD_PORT = self._get_env_int('DASHBOARD_PORT', 5000)
         
-        # AI Models Configuration
-        self._configure_ai_models()
+        # Persistent Storage Configuration
+        self.DATABASE_PATH = self._get_env_var('DATABASE_PATH', 'walshai.db')
         
-        # Professional Features Configuration
-        self._configure_professional_features()
+        self._validated = False
         
-        # Validate configuration
+        # Validate configuration (AI_MODELS and PROFESSIONAL_FEATURES are built on first access)
         self.validate()
     
     def _get_env_var(self, key: str, default: str = '', required: bool = False) -> str:
@@ -73,9 +83,10 @@ class Config:
             logger.warning(f"Invalid integer value for {key}, using default: {default}")
             return default
     
-    def _configure_ai_models(self):
+    @functools.cached_property
+    def AI_MODELS(self) -> Dict[str, Dict[str, Any]]:
         """Configure AI models with enhanced descriptions"""
-        self.AI_MODELS = {
+        return {
             'financial': {
                 'name': 'Financial Investigation Expert',
                 'emoji': '🔍',
@@ -120,9 +131,10 @@ class Config:
             }
         }
     
-    def _configure_professional_features(self):
+    @functools.cached_property
+    def PROFESSIONAL_FEATURES(self) -> Dict[str, bool]:
         """Configure professional feature flags"""
-        self.PROFESSIONAL_FEATURES = {
+        return {
             'financial_suite': True,
             'property_tools': True,
             'company_intelligence': True,
@@ -136,27 +148,22 @@ class Config:
     
     def validate(self) -> bool:
         """Validate configuration with detailed error reporting"""
-        errors = []
+        # Settings don't change after loading, so one successful pass is enough
+        if self._validated:
+            return True
         
-        if not self.TELEGRAM_BOT_TOKEN:
-            errors.append("TELEGRAM_BOT_TOKEN is required")
-            
-        if not self.DEEPSEEK_API_KEY:
-            errors.append("DEEPSEEK_API_KEY is required")
+        errors = [f"{name} is required" for name in _REQUIRED_SETTINGS if not getattr(self, name)]
         
         # Validate numeric ranges
-        if self.MAX_MESSAGE_LENGTH < 100:
-            errors.append("MAX_MESSAGE_LENGTH must be at least 100")
-        
-        if self.MAX_CONVERSATION_HISTORY < 1:
-            errors.append("MAX_CONVERSATION_HISTORY must be at least 1")
-        
-        if self.REQUEST_TIMEOUT < 5:
-            errors.append("REQUEST_TIMEOUT must be at least 5 seconds")
+        errors.extend(
+            message for name, minimum, message in _MINIMUM_SETTINGS
+            if getattr(self, name) < minimum
+        )
         
         if errors:
             raise ValueError(f"Configuration errors: {', '.join(errors)}")
         
+        self._validated = True
         logger.info("Configuration validation successful")
         return True
     
@@ -167,3 +174,9 @@ class Config:
     def is_feature_enabled(self, feature: str) -> bool:
         """Check if a professional feature is enabled"""
         return self.PROFESSIONAL_FEATURES.get(feature, False)
+
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide configuration, reading the environment only once"""
+    return Config()
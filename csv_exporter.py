@@ -7,63 +7,111 @@ Provides portable data export for web dashboard
 import csv
 import os
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Exports are written in one go, so a large buffer saves write syscalls over the 8 KiB default
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Newlines would split a cell across lines in viewers, so they become spaces in one pass
+_NL_TRANS = str.maketrans('\n\r', '  ')
+
+# Column order for each export
+_MESSAGE_FIELDS = (
+    'timestamp', 'user_id', 'username', 'message', 'response',
+    'ai_model', 'response_time', 'message_length', 'response_length',
+    'is_investigation', 'is_property', 'is_company_clone',
+    'is_scam', 'is_profile', 'type'
+)
+_USER_FIELDS = (
+    'user_id', 'total_messages', 'first_seen', 'last_seen',
+    'investigation_queries', 'current_model', 'model_usage',
+    'commands_used', 'session_count', 'avg_response_time'
+)
+_INVESTIGATION_FIELDS = (
+    'id', 'type', 'status', 'created', 'summary',
+    'user_id', 'ai_model', 'response_time'
+)
+_COMPANY_FIELDS = (
+    'id', 'name', 'type', 'industry', 'created',
+    'company_number', 'status', 'registered_address'
+)
+_SCAM_FIELDS = (
+    'id', 'type', 'message', 'timestamp', 'user_id',
+    'risk_level', 'ai_model', 'analysis_result'
+)
+_PROFILE_FIELDS = (
+    'id', 'name', 'type', 'created', 'postcode',
+    'age', 'city', 'full_data'
+)
+
+def _dump_counts(counts: Optional[Dict]) -> str:
+    """Serialize a usage counter for a CSV cell, skipping the encoder for empty ones"""
+    # json handles dict subclasses such as defaultdict directly, so no copy is needed
+    return json.dumps(counts) if counts else '{}'
+
 class CSVExporter:
     """Handles CSV export functionality for all bot data"""
     
     def __init__(self, export_dir: str = "exports"):
         self.export_dir = export_dir
+        # (epoch second, formatted stamp); one tuple so threads always see a matching pair
+        self._stamp_cache = (None, '')
         self.ensure_export_directory()
     
     def ensure_export_directory(self):
         """Create export directory if it doesn't exist"""
-        if not os.path.exists(self.export_dir):
+        # Attempting the create answers "does it exist?" in the same syscall, without a race
+        try:
             os.makedirs(self.export_dir)
             logger.info(f"Created export directory: {self.export_dir}")
+        except FileExistsError:
+            pass
     
-    def export_messages_to_csv(self, message_logs: List[Dict]) -> str:
-        """Export message logs to CSV format"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"messages_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+    def _export_path(self, prefix: str) -> str:
+        """Build the timestamped path for a new export, formatting the stamp once per second"""
+        second = int(time.time())
+        cached_second, stamp = self._stamp_cache
+        if second != cached_second:
+            stamp = datetime.fromtimestamp(second).strftime("%Y%m%d_%H%M%S")
+            self._stamp_cache = (second, stamp)
+        return os.path.join(self.export_dir, f"{prefix}_export_{stamp}.csv")
+    
+    def export_messages_to_csv(self, message_logs: Iterable[Dict]) -> str:
+        """Export message logs to CSV format, consuming them one row at a time"""
+        filepath = self._export_path('messages')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'timestamp', 'user_id', 'username', 'message', 'response',
-                    'ai_model', 'response_time', 'message_length', 'response_length',
-                    'is_investigation', 'is_property', 'is_company_clone', 
-                    'is_scam', 'is_profile', 'type'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(_MESSAGE_FIELDS)
                 
-                for message in message_logs:
-                    # Clean data for CSV export
-                    cleaned_message = {
-                        'timestamp': message.get('timestamp', ''),
-                        'user_id': message.get('user_id', ''),
-                        'username': message.get('username', ''),
-                        'message': str(message.get('message', '')).replace('\n', ' ').replace('\r', ' '),
-                        'response': str(message.get('response', '')).replace('\n', ' ').replace('\r', ' '),
-                        'ai_model': message.get('ai_model', ''),
-                        'response_time': message.get('response_time', 0),
-                        'message_length': message.get('message_length', 0),
-                        'response_length': message.get('response_length', 0),
-                        'is_investigation': message.get('is_investigation', False),
-                        'is_property': message.get('is_property', False),
-                        'is_company_clone': message.get('is_company_clone', False),
-                        'is_scam': message.get('is_scam', False),
-                        'is_profile': message.get('is_profile', False),
-                        'type': message.get('type', 'text')
-                    }
-                    writer.writerow(cleaned_message)
+                # Clean data for CSV export; rows are tuples in _MESSAGE_FIELDS order, produced lazily
+                # so writerows() drives the loop
+                writer.writerows(
+                    (
+                        message.get('timestamp', ''),
+                        message.get('user_id', ''),
+                        message.get('username', ''),
+                        str(message.get('message', '')).translate(_NL_TRANS),
+                        str(message.get('response', '')).translate(_NL_TRANS),
+                        message.get('ai_model', ''),
+                        message.get('response_time', 0),
+                        message.get('message_length', 0),
+                        message.get('response_length', 0),
+                        message.get('is_investigation', False),
+                        message.get('is_property', False),
+                        message.get('is_company_clone', False),
+                        message.get('is_scam', False),
+                        message.get('is_profile', False),
+                        message.get('type', 'text')
+                    )
+                    for message in message_logs
+                )
             
             logger.info(f"Messages exported to CSV: {filepath}")
             return filepath
@@ -74,19 +122,11 @@ class CSVExporter:
     
     def export_users_to_csv(self, user_stats: Dict) -> str:
         """Export user statistics to CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"users_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        filepath = self._export_path('users')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'user_id', 'total_messages', 'first_seen', 'last_seen',
-                    'investigation_queries', 'current_model', 'model_usage',
-                    'commands_used', 'session_count', 'avg_response_time'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=_USER_FIELDS)
                 writer.writeheader()
                 
                 for user_id, stats in user_stats.items():
@@ -97,8 +137,8 @@ class CSVExporter:
                         'last_seen': stats.get('last_seen', ''),
                         'investigation_queries': stats.get('investigation_queries', 0),
                         'current_model': stats.get('current_model', ''),
-                        'model_usage': json.dumps(dict(stats.get('model_usage', {}))),
-                        'commands_used': json.dumps(dict(stats.get('commands_used', {}))),
+                        'model_usage': _dump_counts(stats.get('model_usage')),
+                        'commands_used': _dump_counts(stats.get('commands_used')),
                         'session_count': stats.get('session_count', 0),
                         'avg_response_time': stats.get('avg_response_time', 0.0)
                     }
@@ -113,22 +153,14 @@ class CSVExporter:
     
     def export_investigations_to_csv(self, investigations: List[Dict]) -> str:
         """Export investigation data to CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"investigations_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        filepath = self._export_path('investigations')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'id', 'type', 'status', 'created', 'summary',
-                    'user_id', 'ai_model', 'response_time'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=_INVESTIGATION_FIELDS)
                 writer.writeheader()
                 
-                for investigation in investigations:
-                    writer.writerow(investigation)
+                writer.writerows(investigations)
             
             logger.info(f"Investigations exported to CSV: {filepath}")
             return filepath
@@ -139,22 +171,14 @@ class CSVExporter:
     
     def export_companies_to_csv(self, companies: List[Dict]) -> str:
         """Export company data to CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"companies_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        filepath = self._export_path('companies')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'id', 'name', 'type', 'industry', 'created',
-                    'company_number', 'status', 'registered_address'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=_COMPANY_FIELDS)
                 writer.writeheader()
                 
-                for company in companies:
-                    writer.writerow(company)
+                writer.writerows(companies)
             
             logger.info(f"Companies exported to CSV: {filepath}")
             return filepath
@@ -165,32 +189,26 @@ class CSVExporter:
     
     def export_scams_to_csv(self, scams: List[Dict]) -> str:
         """Export scam analysis data to CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"scams_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        filepath = self._export_path('scams')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'id', 'type', 'message', 'timestamp', 'user_id',
-                    'risk_level', 'ai_model', 'analysis_result'
-                ]
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(_SCAM_FIELDS)
                 
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for scam in scams:
-                    cleaned_scam = {
-                        'id': scam.get('id', ''),
-                        'type': scam.get('type', ''),
-                        'message': str(scam.get('message', '')).replace('\n', ' ').replace('\r', ' '),
-                        'timestamp': scam.get('timestamp', ''),
-                        'user_id': scam.get('user_id', ''),
-                        'risk_level': scam.get('risk_level', ''),
-                        'ai_model': scam.get('ai_model', ''),
-                        'analysis_result': scam.get('analysis_result', '')
-                    }
-                    writer.writerow(cleaned_scam)
+                writer.writerows(
+                    (
+                        scam.get('id', ''),
+                        scam.get('type', ''),
+                        str(scam.get('message', '')).translate(_NL_TRANS),
+                        scam.get('timestamp', ''),
+                        scam.get('user_id', ''),
+                        scam.get('risk_level', ''),
+                        scam.get('ai_model', ''),
+                        scam.get('analysis_result', '')
+                    )
+                    for scam in scams
+                )
             
             logger.info(f"Scams exported to CSV: {filepath}")
             return filepath
@@ -201,18 +219,11 @@ class CSVExporter:
     
     def export_profiles_to_csv(self, profiles: List[Dict]) -> str:
         """Export generated profiles to CSV"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"profiles_export_{timestamp}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        filepath = self._export_path('profiles')
         
         try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'id', 'name', 'type', 'created', 'postcode',
-                    'age', 'city', 'full_data'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            with open(filepath, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=_PROFILE_FIELDS)
                 writer.writeheader()
                 
                 for profile in profiles:
@@ -237,26 +248,24 @@ class CSVExporter:
     
     def get_export_files(self) -> List[Dict[str, str]]:
         """Get list of available export files"""
-        export_files = []
-        
         try:
-            for filename in os.listdir(self.export_dir):
-                if filename.endswith('.csv'):
-                    filepath = os.path.join(self.export_dir, filename)
-                    file_stats = os.stat(filepath)
-                    
-                    export_files.append({
-                        'filename': filename,
-                        'filepath': filepath,
-                        'size': file_stats.st_size,
-                        'created': datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-                        'modified': datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-                    })
-            
-            # Sort by creation time, newest first
-            export_files.sort(key=lambda x: x['created'], reverse=True)
-            
+            # scandir yields each entry with its path, so only the stat call remains per file
+            with os.scandir(self.export_dir) as entries:
+                csv_entries = [(entry, entry.stat()) for entry in entries if entry.name.endswith('.csv')]
         except Exception as e:
             logger.error(f"Error getting export files: {e}")
+            return []
+        
+        # Sort by creation time, newest first, on the raw timestamps before any formatting
+        csv_entries.sort(key=lambda item: item[1].st_ctime, reverse=True)
         
-        return export_files
+        return [
+            {
+                'filename': entry.name,
+                'filepath': entry.path,
+                'size': file_stats.st_size,
+                'created': datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
+                'modified': datetime.fromtimestamp(file_stats.st_mtime).isoformat()
+            }
+            for entry, file_stats in csv_entries
+        ]
@@ -5,9 +5,8 @@ Centralized data generation with UK-specific formatting
 """
 
 import random
-import string
 from typing import Dict, List
-from datetime import datetime, timedelta
+from datetime import datetime
 
 class UKDataGenerator:
     """UK-specific data generation utilities"""
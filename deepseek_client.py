@@ -4,20 +4,38 @@ Enhanced DeepSeek API Client with optimized performance and error handling
 
 import logging
 import requests
+import httpx
 import json
 import time
 import socket
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from urllib3.exceptions import InsecureRequestWarning
 import urllib3
 
+try:
+    import orjson
+except ImportError:
+    # Optional C-accelerated JSON; the stdlib is used when it isn't installed
+    orjson = None
+
 # Suppress SSL warnings for development (Windows compatibility)
 urllib3.disable_warnings(InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+
+def _dumps(payload) -> bytes:
+    """Serialize a request payload to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the same error either way
+_loads = orjson.loads if orjson is not None else json.loads
+
 class DeepSeekAPIError(Exception):
     """Custom exception for DeepSeek API errors"""
     def __init__(self, message: str, status_code: int = None, response_data: dict = None):
@@ -25,6 +43,9 @@ class DeepSeekAPIError(Exception):
         self.status_code = status_code
         self.response_data = response_data
 
+class StreamInterruptedError(DeepSeekAPIError):
+    """Raised when a stream stops after yielding content but before the API marked it finished"""
+
 class DeepSeekClient:
     """Enhanced DeepSeek API client with improved error handling and performance"""
 
@@ -38,6 +59,9 @@ class DeepSeekClient:
         # Initialize optimized session
         self._setup_session()
 
+        # Async client for streaming responses (created on first use)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
         # Performance metrics
         self.request_count = 0
         self.total_response_time = 0.0
@@ -101,11 +125,11 @@ class DeepSeekClient:
                 "top_p": 0.9
             }
 
-            logger.debug(f"Sending request to DeepSeek API ({len(messages)} messages)")
+            logger.debug("Sending request to DeepSeek API (%d messages)", len(messages))
 
             response = self.session.post(
                 self.api_url,
-                json=payload,
+                data=_dumps(payload),
                 timeout=min(self.timeout, 30),
                 verify=True  # Enable SSL verification for production
             )
@@ -113,7 +137,7 @@ class DeepSeekClient:
             response_time = time.time() - start_time
             self.total_response_time += response_time
 
-            logger.debug(f"API request completed in {response_time:.2f}s")
+            logger.debug("API request completed in %.2fs", response_time)
 
             return self._handle_response(response)
 
@@ -141,6 +165,175 @@ class DeepSeekClient:
             logger.error(f"Unexpected error: {e}")
             return "❌ Unexpected error occurred. Please try again."
 
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get the shared async HTTP client, creating it on first use"""
+        if self._async_client is None:
+            # HTTP/2 multiplexes concurrent users' requests over a few pooled connections
+            self._async_client = httpx.AsyncClient(
+                http2=True,
+                headers=dict(self.session.headers),
+                timeout=httpx.Timeout(min(self.timeout, 30), connect=10.0),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+            )
+        return self._async_client
+
+    async def acreate_chat_completion(self, messages: List[Dict[str, str]],
+                                      temperature: float = 0.3,
+                                      max_tokens: int = 1200) -> Optional[str]:
+        """Async chat completion over the shared httpx client, for callers on the event loop"""
+        try:
+            start_time = time.time()
+            self.request_count += 1
+
+            if not messages or not isinstance(messages, list):
+                raise DeepSeekAPIError("Invalid messages format")
+
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": max(0.0, min(1.0, temperature)),
+                "max_tokens": max(100, min(2000, max_tokens)),
+                "stream": False,
+                "frequency_penalty": 0.0,
+                "presence_penalty": 0.0,
+                "top_p": 0.9
+            }
+
+            logger.debug("Sending async request to DeepSeek API (%d messages)", len(messages))
+
+            response = await self._get_async_client().post(self.api_url, content=_dumps(payload))
+
+            response_time = time.time() - start_time
+            self.total_response_time += response_time
+
+            logger.debug("Async API request completed in %.2fs", response_time)
+
+            return self._handle_response(response)
+
+        except httpx.TimeoutException:
+            self.error_count += 1
+            logger.error(f"Request timeout ({self.timeout}s)")
+            return "⏰ Response timeout - the AI service is responding slowly. Please try again."
+
+        except httpx.ConnectError as e:
+            self.error_count += 1
+            return self._handle_connection_error(e)
+
+        except httpx.HTTPError as e:
+            self.error_count += 1
+            logger.error(f"Network error: {e}")
+            return "🌐 Network error - please check your connection and try again."
+
+        except DeepSeekAPIError as e:
+            self.error_count += 1
+            logger.error(f"DeepSeek API error: {e}")
+            return f"❌ API Error: {str(e)}"
+
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Unexpected error: {e}")
+            return "❌ Unexpected error occurred. Please try again."
+
+    async def stream_chat_completion(self, messages: List[Dict[str, str]],
+                                     temperature: float = 0.3,
+                                     max_tokens: int = 1200) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive via SSE
+
+        Errors are yielded as a single user-facing message with the same prefixes
+        create_chat_completion returns; nothing is yielded when credits are exhausted.
+        Once content has been yielded, an error or an end of stream before [DONE] or a
+        finish_reason raises StreamInterruptedError, so a cut-off reply is never mistaken
+        for a complete one.
+        """
+        start_time = time.time()
+        self.request_count += 1
+        received_content = False
+        finished = False
+
+        try:
+            if not messages or not isinstance(messages, list):
+                raise DeepSeekAPIError("Invalid messages format")
+
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": max(0.0, min(1.0, temperature)),
+                "max_tokens": max(100, min(2000, max_tokens)),
+                "stream": True,
+                "frequency_penalty": 0.0,
+                "presence_penalty": 0.0,
+                "top_p": 0.9
+            }
+
+            logger.debug("Streaming request to DeepSeek API (%d messages)", len(messages))
+
+            async with self._get_async_client().stream("POST", self.api_url, content=_dumps(payload)) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    error_message = self._handle_response(response)
+                    if error_message:
+                        yield error_message
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        finished = True
+                        break
+                    try:
+                        chunk = _loads(data)
+                    except json.JSONDecodeError:
+                        logger.debug("Skipping malformed SSE frame")
+                        continue
+                    choices = chunk.get('choices')
+                    if choices:
+                        content = choices[0].get('delta', {}).get('content')
+                        if content:
+                            received_content = True
+                            yield content
+                        if choices[0].get('finish_reason'):
+                            finished = True
+
+                if received_content and not finished:
+                    raise StreamInterruptedError("Stream ended before the response was complete")
+
+        except StreamInterruptedError:
+            self.error_count += 1
+            logger.error("Stream ended before the response was complete")
+            raise
+
+        except httpx.TimeoutException:
+            self.error_count += 1
+            logger.error(f"Streaming request timeout ({self.timeout}s)")
+            if received_content:
+                raise StreamInterruptedError("Stream timed out before the response was complete")
+            yield "⏰ Response timeout - the AI service is responding slowly. Please try again."
+
+        except httpx.ConnectError as e:
+            self.error_count += 1
+            if received_content:
+                raise StreamInterruptedError("Connection lost before the response was complete") from e
+            yield self._handle_connection_error(e)
+
+        except httpx.HTTPError as e:
+            self.error_count += 1
+            logger.error(f"Network error while streaming: {e}")
+            if received_content:
+                raise StreamInterruptedError("Network error before the response was complete") from e
+            yield "🌐 Network error - please check your connection and try again."
+
+        except DeepSeekAPIError as e:
+            self.error_count += 1
+            logger.error(f"DeepSeek API error: {e}")
+            yield f"❌ API Error: {str(e)}"
+
+        finally:
+            response_time = time.time() - start_time
+            self.total_response_time += response_time
+            logger.debug("Streaming request completed in %.2fs", response_time)
+
     def _handle_response(self, response: requests.Response) -> Optional[str]:
         """Handle API response with comprehensive error checking"""
         status_code = response.status_code
@@ -150,7 +343,7 @@ class DeepSeekClient:
                 data = response.json()
                 if 'choices' in data and len(data['choices']) > 0:
                     content = data['choices'][0]['message']['content']
-                    logger.debug(f"Successfully received response ({len(content)} chars)")
+                    logger.debug("Successfully received response (%d chars)", len(content))
                     return content.strip()
                 else:
                     logger.error("Invalid response format from DeepSeek API")
@@ -256,4 +449,11 @@ class DeepSeekClient:
         """Clean up resources"""
         if hasattr(self, 'session') and self.session:
             self.session.close()
-            logger.debug("DeepSeek client session closed")
\ No newline at end of file
+            logger.debug("DeepSeek client session closed")
+
+    async def aclose(self):
+        """Clean up async resources"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            logger.debug("DeepSeek async client closed")
\ No newline at end of file
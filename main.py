@@ -5,11 +5,10 @@ Main application entry point
 """
 
 import logging
-import os
 import threading
 import time
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
-from config import Config
+from telegram.ext import AIORateLimiter, Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from config import get_config
 from bot_handlers import BotHandlers
 from web_dashboard import BotDashboard
 
@@ -28,7 +27,7 @@ def main():
     """Main function to start the bot"""
     try:
         # Load configuration
-        config = Config()
+        config = get_config()
 
         # Validate required environment variables
         if not config.TELEGRAM_BOT_TOKEN:
@@ -36,12 +35,21 @@ def main():
         if not config.DEEPSEEK_API_KEY:
             raise ValueError("DEEPSEEK_API_KEY is required")
 
-        # Create application with optimized settings for faster responses
-        application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).read_timeout(8).write_timeout(8).build()
-
         # Initialize bot handlers
         bot_handlers = BotHandlers(config)
 
+        # Create application with optimized settings for faster responses;
+        # the rate limiter keeps bursts of replies within Telegram's flood limits
+        application = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            .read_timeout(8)
+            .write_timeout(8)
+            .rate_limiter(AIORateLimiter())
+            .post_shutdown(bot_handlers.shutdown)
+            .build()
+        )
+
         # Test DeepSeek connection at startup with retry
         logger.info("Testing DeepSeek API connection...")
         connection_attempts = 0
@@ -87,6 +95,9 @@ def main():
         # Add error handler
         application.add_error_handler(bot_handlers.error_handler)
 
+        # Periodically release per-user state left behind by inactive users
+        application.job_queue.run_repeating(bot_handlers.sweep_idle_users, interval=300, first=300)
+
         logger.info("Starting WalshAI Multi-Expert AI Bot...")
         logger.info("Dashboard available at: http://localhost:5000")
 
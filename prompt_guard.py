@@ -0,0 +1,59 @@
+
+"""
+Prompt-injection screening for incoming user messages
+Rejects known instruction-override and system-prompt extraction phrasings before any API call
+"""
+
+import re
+from typing import Optional
+
+# Every gap is bounded and no quantifier is nested, so adversarial input
+# can't trigger catastrophic backtracking in Python's re engine
+_INJECTION_PATTERNS = (
+    # English: instruction overrides. The target must be the assistant's own instructions
+    # ("all previous", "your", "these", "system"), so "how do fraudsters bypass all KYC rules?"
+    # or "ignore the previous instructions from my solicitor" pass
+    r"\b(?:ignore|disregard|forget|override|bypass)\s+all\s+(?:of\s+)?(?:the\s+|your\s+)?"
+    r"(?:previous|prior|above|earlier|preceding)\s+(?:instructions?|prompts?|directions)\b",
+    r"\b(?:ignore|disregard|forget|override|bypass)\s+(?:all\s+(?:of\s+)?)?(?:your|these|(?:the\s+)?system'?s?)\s+"
+    r"(?:(?:previous|prior|initial|original|current|system)\s+)?"
+    r"(?:instructions?|prompts?|rules|guidelines|directions|programming)\b",
+    # English: system prompt extraction. Only the assistant's prompt is a target, so "the initial
+    # instructions for a tax return" or "the system messages a phishing kit sends" pass
+    r"\b(?:reveal|show|print|display|repeat|output|leak|tell me|give me|what (?:is|are|were))\b.{0,20}?"
+    r"\b(?:your\s+(?:(?:system|initial|original|hidden|secret|developer)\s+)?prompts?"
+    r"|your\s+(?:system|initial|original|hidden|secret|developer)\s+(?:instructions?|messages?)"
+    r"|system\s+prompts?"
+    r"|(?:prompts?|instructions?)\s+(?:you\s+(?:were|have\s+been)\s+given|given\s+to\s+you))\b",
+    r"\brepeat\b.{0,30}?\b(?:sentences?|words?|messages?|lines?|text|everything)\s+above\b",
+    # English: persona jailbreaks, addressed to the assistant ("enable developer mode on Android" passes)
+    r"\byou are now\b.{0,30}?\b(?:dan|jailbroken|unrestricted|unfiltered)\b",
+    r"\byou(?:'re|\s+are)\s+(?:now\s+)?in\s+(?:developer|god|jailbreak|dan) mode\b",
+    r"\b(?:pretend|act as if|imagine)\b.{0,20}?\byou\b.{0,30}?\b(?:no|without)\b.{0,20}?"
+    r"\b(?:restrictions|rules|guidelines|filters)\b",
+    # Spanish, Portuguese, Italian
+    r"\bignor[ae]\w{0,6}\b.{0,40}?\b(?:instrucciones|instru[çc][õo]es|istruzioni)\b",
+    r"\b(?:prompt|instrucciones) del sistema\b",
+    # French
+    r"\b(?:ignore[rz]?|oublie[rz]?)\s+(?:toutes\s+)?(?:les|tes|vos)\s+(?:\w+\s+)?(?:instructions|consignes)\b",
+    r"\bprompt syst[èe]me\b",
+    # German, Dutch
+    r"\b(?:ignorier\w{0,3}|vergiss|negeer)\b.{0,40}?\b(?:anweisungen|instruktionen|instructies)\b",
+    r"\bsystem-?prompt\b.{0,30}?\b(?:zeig|ausgeben|wiederhol)",
+    # Russian
+    r"\b(?:игнорируй|забудь)\b.{0,40}?инструкци",
+    r"системн\w{0,3} (?:промпт|подсказк)",
+    # Chinese, Japanese, Korean
+    r"(?:忽略|无视|忘记).{0,20}?(?:指令|指示)",
+    r"系统提示",
+    r"(?:指示|命令|プロンプト).{0,20}?無視",
+    r"(?:지시|명령|프롬프트).{0,20}?무시",
+)
+
+_INJECTION_RE = re.compile("|".join(f"(?:{pattern})" for pattern in _INJECTION_PATTERNS), re.IGNORECASE | re.DOTALL)
+
+
+def detect_prompt_injection(text: str) -> Optional[str]:
+    """Return the offending fragment if text looks like a prompt-injection attempt, otherwise None"""
+    match = _INJECTION_RE.search(text)
+    return match.group(0) if match else None
@@ -0,0 +1,197 @@
+
+"""
+Persistent bot state backed by SQLite
+Keeps authentication state and conversation history across restarts without an external database
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+from cachetools import LRUCache
+
+try:
+    import orjson
+except ImportError:
+    # Optional C-accelerated JSON; the stdlib is used when it isn't installed
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class ChatTurn(NamedTuple):
+    """One conversation message; a tuple costs a fraction of a dict per stored turn"""
+    role: str
+    content: str
+
+
+# orjson.JSONDecodeError subclasses ValueError, which load_conversation already handles
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_turns(turns: Iterable[ChatTurn]) -> bytes:
+    """Serialize turns to compact UTF-8 JSON [role, content] pairs"""
+    # Plain tuples, since orjson doesn't serialize NamedTuple subclasses
+    pairs = [(role, content) for role, content in turns]
+    if orjson is not None:
+        return orjson.dumps(pairs)
+    return json.dumps(pairs, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class BotStorage:
+    """Lightweight SQLite store for state that must survive a restart"""
+
+    def __init__(self, db_path: str = "walshai.db"):
+        self.db_path = db_path
+        # Conversation reads and writes run on ConversationCache's writer thread, the rest on the
+        # event loop, so the connection is shared and every use of it holds the lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the database consistent on crash; per-commit fsync isn't needed for chat history
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create tables if they don't exist"""
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS authenticated_users ("
+                "user_id INTEGER PRIMARY KEY, "
+                "authenticated_at REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "user_id INTEGER PRIMARY KEY, "
+                "messages BLOB NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def load_authenticated_users(self) -> Set[int]:
+        """Load the IDs of all users who have entered the passcode"""
+        with self._lock:
+            rows = self.connection.execute("SELECT user_id FROM authenticated_users").fetchall()
+        return {row[0] for row in rows}
+
+    def add_authenticated_user(self, user_id: int):
+        """Remember that a user has entered the passcode"""
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO authenticated_users (user_id, authenticated_at) VALUES (?, ?)",
+                    (user_id, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to persist authenticated user {user_id}: {e}")
+
+    def load_conversation(self, user_id: int) -> List[ChatTurn]:
+        """Load a user's saved conversation history (oldest message first)"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT messages FROM conversations WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return []
+        try:
+            turns = _loads(zlib.decompress(row[0]))
+            # Rows saved before turns were stored as pairs hold role/content objects
+            return [
+                ChatTurn(sys.intern(turn['role']), turn['content']) if isinstance(turn, dict)
+                else ChatTurn(sys.intern(turn[0]), turn[1])
+                for turn in turns
+            ]
+        except (zlib.error, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"Discarding unreadable conversation for user {user_id}: {e}")
+            return []
+
+    def save_conversation(self, user_id: int, turns: Iterable[ChatTurn]):
+        """Save a user's conversation history as compressed JSON [role, content] pairs"""
+        blob = zlib.compress(_dumps_turns(turns))
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO conversations (user_id, messages, updated_at) VALUES (?, ?, ?)",
+                    (user_id, blob, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to persist conversation for user {user_id}: {e}")
+
+    def delete_conversation(self, user_id: int) -> bool:
+        """Delete a user's saved conversation history, returning whether one existed"""
+        try:
+            with self._lock, self.connection:
+                cursor = self.connection.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Failed to delete conversation for user {user_id}: {e}")
+            return False
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.connection.close()
+
+
+class ConversationCache(LRUCache):
+    """Bounded in-memory view of conversation histories, loaded lazily from BotStorage"""
+
+    def __init__(self, storage: BotStorage, maxsize: int, history_length: int):
+        super().__init__(maxsize=maxsize)
+        self.storage = storage
+        self.history_length = history_length
+        # One thread does all conversation disk I/O off the event loop; being the only one,
+        # it runs reads, saves and deletes in the order they were queued
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-io")
+        # Disk reads in progress, shared by concurrent loads and dropped by forget
+        self._reads: Dict[int, asyncio.Future] = {}
+
+    async def load(self, user_id: int) -> deque:
+        """Return a user's history, restoring it from disk on first touch (or after eviction)"""
+        conversation = self.get(user_id)
+        if conversation is not None:
+            return conversation
+
+        read = self._reads.get(user_id)
+        if read is None:
+            read = asyncio.get_running_loop().run_in_executor(
+                self._executor, self.storage.load_conversation, user_id
+            )
+            self._reads[user_id] = read
+        turns = await asyncio.shield(read)
+
+        # Another load may have finished first
+        conversation = self.get(user_id)
+        if conversation is None:
+            # Forgotten while the read was queued: the saved history is being deleted
+            if self._reads.pop(user_id, None) is not read:
+                turns = ()
+            conversation = deque(turns, maxlen=self.history_length)
+            self[user_id] = conversation
+        return conversation
+
+    def save(self, user_id: int, conversation: deque):
+        """Queue a history write to disk, unless it was cleared while in use"""
+        if self.get(user_id) is conversation:
+            # A snapshot, since the deque keeps changing after this returns
+            self._executor.submit(self.storage.save_conversation, user_id, tuple(conversation))
+
+    async def forget(self, user_id: int) -> bool:
+        """Drop a user's history from memory and disk, returning whether there was any"""
+        cached = self.pop(user_id, None)
+        self._reads.pop(user_id, None)
+        deleted = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.storage.delete_conversation, user_id
+        )
+        return deleted or cached is not None
+
+    def close(self):
+        """Wait for queued writes to reach disk and stop the I/O thread"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,38 @@
+import pytest
+
+from bot_handlers import BotHandlers
+from storage import ChatTurn
+
+
+def key(text, model_id='financial'):
+    return BotHandlers._response_cache_key(model_id, [ChatTurn('user', text)])
+
+
+@pytest.mark.parametrize("first, second", [
+    ("What is the ROI on £1200 rent?", "What is the ROI on £1500 rent?"),
+    ("What is ROI on $1200 rent?", "What is ROI on £1200 rent?"),
+    ("What is 5+3?", "What is 5-3?"),
+    ("What is 5+3?", "What is 5*3?"),
+    ("Is a 10% drop bad?", "Is a 10 drop bad?"),
+    ("Is a 5.3% yield good?", "Is a 53% yield good?"),
+    ("How do I register a company in the UK?", "How do I register a company in the US?"),
+    ("Is this suspicious?", "Is this not suspicious?"),
+    ("Convert USD to GBP", "Convert GBP to USD"),
+])
+def test_questions_that_differ_in_meaning_get_different_keys(first, second):
+    assert key(first) != key(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("What is AML?", "what is aml"),
+    ("What is AML?", "  What   is AML ? "),
+    ("Hello, how are you?", "hello how are you"),
+    ("What's a “golden share”?", "what's a golden share"),
+    ("ＲＯＩ on £1200?", "roi on £1200"),
+])
+def test_cosmetic_differences_share_a_key(first, second):
+    assert key(first) == key(second)
+
+
+def test_keys_are_per_model():
+    assert key("What is AML?", 'financial') != key("What is AML?", 'legal')
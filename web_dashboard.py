@@ -4,12 +4,10 @@ Optimized for Windows compatibility and improved performance
 """
 
 import logging
-import json
 import os
-import threading
 import random
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request, send_from_directory, send_file
+from flask import Flask, render_template, jsonify, request, send_file
 from collections import defaultdict, deque
 from typing import Dict, List, Any
 from csv_exporter import CSVExporter
@@ -34,6 +32,9 @@ class BotDashboard:
         # Initialize CSV exporter and communication tools
         self.csv_exporter = CSVExporter()
         self.communication_suite = CommunicationSuite()
+        
+        # Companies House client, created on first lookup so its result cache outlives each request
+        self.companies_house = None
 
         # Analytics data with optimized storage
         self.message_logs = deque(maxlen=2000)  # Increased capacity
@@ -125,6 +126,12 @@ class BotDashboard:
 
         logger.debug(f"Message logged for user {user_id} with model {ai_model}")
 
+    def log_batch(self, entries: List[Dict[str, Any]]):
+        """Log a batch of messages queued by the bot handlers"""
+        for entry in entries:
+            self.log_message(**entry)
+        logger.debug(f"Logged batch of {len(entries)} messages")
+
     def _update_performance_metrics(self, response_time: float):
         """Update performance metrics efficiently"""
         self.performance_metrics['total_response_time'] += response_time
@@ -434,7 +441,6 @@ class BotDashboard:
             """Get generated profiles data"""
             try:
                 profiles = []
-                profile_messages = [m for m in self.message_logs if m.get('is_profile')]
                 
                 # Get profiles from bot handlers if available
                 if hasattr(self.bot_handlers, 'generated_profiles'):
@@ -482,8 +488,9 @@ class BotDashboard:
                     return jsonify({'success': False, 'error': 'Company name is required'}), 400
                 
                 # Use real Companies House API
-                companies_house = CompaniesHouseAPI()
-                company_info = companies_house.lookup_company_comprehensive(company_name)
+                if self.companies_house is None:
+                    self.companies_house = CompaniesHouseAPI()
+                company_info = self.companies_house.lookup_company_comprehensive(company_name)
                 
                 # Store the real company info
                 if company_info.get('success') and hasattr(self.bot_handlers, 'company_profiles'):
@@ -710,7 +717,7 @@ class BotDashboard:
         def api_communication_logs():
             """Get communication activity logs"""
             try:
-                logs = self.communication_suite.communication_logs[-100:]  # Last 100 logs
+                logs = self.communication_suite.recent_logs(100)  # Last 100 logs
                 return jsonify({'logs': logs, 'total': len(logs)})
             except Exception as e:
                 logger.error(f"Communication logs error: {e}")